@@ -0,0 +1,67 @@
+import hashlib
+import re
+
+# 64-bit SimHash over word bigrams, for near-duplicate detection.
+# Fingerprints within MAX_DISTANCE bits of each other are near-duplicates
+# (a handful of edited words in a 400-word story typically moves 2-6 bits,
+# unrelated stories sit 20+ bits apart).
+# With 8 bands of 8 bits, two fingerprints that differ in at most 7 bits
+# always share at least one band exactly, so bands work as LSH buckets.
+SIMHASH_BITS = 64
+NUM_BANDS = 8
+BAND_BITS = SIMHASH_BITS // NUM_BANDS
+MAX_DISTANCE = 6
+SHINGLE_SIZE = 2
+
+# Split on whitespace and punctuation (incl. the Bangla danda); works for Bangla and English
+TOKEN_SPLIT = re.compile(r'[\s\.,;:!?"\'()\[\]{}।“”‘’\-–—]+')
+
+def tokenize(text):
+    return [t for t in TOKEN_SPLIT.split(text.lower()) if t]
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+def simhash(text, shingle_size=SHINGLE_SIZE):
+    """
+    Unsigned 64-bit SimHash of `text`, or None if the text has no tokens.
+    """
+    tokens = tokenize(text or "")
+    if not tokens:
+        return None
+
+    if len(tokens) < shingle_size:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = _hash(shingle)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+def bands(fingerprint):
+    """
+    Split a fingerprint into NUM_BANDS integers (LSH bucket keys).
+    """
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (i * BAND_BITS)) & mask for i in range(NUM_BANDS)]
+
+def to_signed(fingerprint):
+    """
+    Unsigned 64-bit -> signed, for storage in a BIGINT column.
+    """
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+def from_signed(value):
+    return value + (1 << 64) if value < 0 else value
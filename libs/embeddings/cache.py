@@ -0,0 +1,134 @@
+import atexit
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+from libs.utils.redis_client import get_redis
+
+# Two-tier embedding cache keyed by sha256(model id + normalized text):
+# a bounded in-process LRU in front of Redis (float32 bytes with a TTL), so
+# the processor and every API worker share results. Redis failures only cost
+# a cache miss.
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+EMBED_CACHE_TTL = int(os.getenv("EMBED_CACHE_TTL", str(7 * 24 * 3600)))
+EMBED_CACHE_KEY_PREFIX = "bciip:emb:"
+# Hash of hit/miss counters summed over all processes. Each process counts
+# locally and adds its counts to the hash every EMBED_STATS_FLUSH_CALLS
+# lookups or EMBED_STATS_FLUSH_SECONDS, so LRU hits cost no Redis round trip
+EMBED_CACHE_STATS_KEY = "bciip:embedding_cache:stats"
+EMBED_STATS_FLUSH_CALLS = int(os.getenv("EMBED_STATS_FLUSH_CALLS", "100"))
+EMBED_STATS_FLUSH_SECONDS = float(os.getenv("EMBED_STATS_FLUSH_SECONDS", "30"))
+
+WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text):
+    return WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+def cache_key(model_id, text):
+    digest = hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+    return digest
+
+class EmbeddingCache:
+    def __init__(self, model_id, max_size=EMBED_CACHE_SIZE, ttl=EMBED_CACHE_TTL):
+        self.model_id = model_id
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0}
+        self._unflushed = dict.fromkeys(self.stats, 0)
+        self._unflushed_calls = 0
+        self._flushed_at = time.monotonic()
+        atexit.register(self.flush_stats)
+
+    def _count(self, **counts):
+        with self._lock:
+            for field, n in counts.items():
+                self.stats[field] += n
+                self._unflushed[field] += n
+            self._unflushed_calls += 1
+            due = (self._unflushed_calls >= EMBED_STATS_FLUSH_CALLS
+                   or time.monotonic() - self._flushed_at >= EMBED_STATS_FLUSH_SECONDS)
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        """
+        Add the counts since the last flush to the shared Redis hash.
+        """
+        with self._lock:
+            counts = {field: n for field, n in self._unflushed.items() if n}
+            self._unflushed = dict.fromkeys(self.stats, 0)
+            self._unflushed_calls = 0
+            self._flushed_at = time.monotonic()
+        if not counts:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for field, n in counts.items():
+                pipe.hincrby(EMBED_CACHE_STATS_KEY, field, n)
+            pipe.execute()
+        except Exception:
+            pass
+
+    def _remember(self, key, embedding):
+        with self._lock:
+            self._lru[key] = embedding
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def get_many(self, texts):
+        """
+        Cached embeddings for `texts`, as a list with None for misses.
+        """
+        keys = [cache_key(self.model_id, text) for text in texts]
+        results = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    results[i] = self._lru[key]
+        lru_hits = sum(r is not None for r in results)
+
+        missing = [i for i, r in enumerate(results) if r is None]
+        redis_hits = 0
+        if missing:
+            try:
+                values = get_redis().mget([EMBED_CACHE_KEY_PREFIX + keys[i] for i in missing])
+                for i, value in zip(missing, values):
+                    if value is not None:
+                        results[i] = np.frombuffer(value, dtype=np.float32)
+                        self._remember(keys[i], results[i])
+                        redis_hits += 1
+            except Exception as e:
+                print(f"Embedding cache read failed: {e}")
+
+        self._count(lru_hits=lru_hits, redis_hits=redis_hits, misses=len(texts) - lru_hits - redis_hits)
+        return results
+
+    def put_many(self, texts, embeddings):
+        keys = [cache_key(self.model_id, text) for text in texts]
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for key, embedding in zip(keys, embeddings):
+                pipe.set(EMBED_CACHE_KEY_PREFIX + key, np.asarray(embedding, dtype=np.float32).tobytes(), ex=self.ttl)
+            pipe.execute()
+        except Exception as e:
+            print(f"Embedding cache write failed: {e}")
+        for key, embedding in zip(keys, embeddings):
+            self._remember(key, np.asarray(embedding, dtype=np.float32))
+
+def get_cache_stats():
+    """
+    Hit/miss counters across all processes, plus the hit rate.
+    """
+    raw = get_redis().hgetall(EMBED_CACHE_STATS_KEY)
+    stats = {field: int(raw.get(field.encode("utf-8"), 0)) for field in ("lru_hits", "redis_hits", "misses")}
+    lookups = sum(stats.values())
+    stats["hit_rate"] = round((stats["lru_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+    return stats
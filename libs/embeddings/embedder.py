@@ -1,11 +1,28 @@
-from sentence_transformers import SentenceTransformer
+import numpy as np
 import os
+import requests
+from libs.embeddings.cache import EmbeddingCache
 
 # Using a lightweight model for MVP
 MODEL_NAME = 'all-MiniLM-L6-v2'
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '../../models/sentence-transformers')
+# Inference backend: "torch" (sentence-transformers), "onnx" or "onnx-int8"
+# (ONNX Runtime, see libs/embeddings/onnx_backend.py). The ONNX backends do not
+# import torch at all.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Output size of MODEL_NAME, matching the Vector(384) column
+EMBEDDING_DIM = 384
+# Client mode: send texts to a shared embedding server instead of loading the
+# model in this process (services/embedding_server/main.py)
+EMBEDDING_SERVER_URL = os.getenv("EMBEDDING_SERVER_URL")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("EMBEDDING_SERVER_TIMEOUT", "30"))
+# Texts per forward pass in encode_texts
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
 
 _model = None
+# Backend is part of the model id: int8 vectors differ slightly from fp32 ones
+_cache = EmbeddingCache(f"{MODEL_NAME}:{EMBEDDING_BACKEND}")
+_server_session = requests.Session()
 
 def get_model():
     global _model
@@ -14,25 +31,93 @@ def get_model():
             # We rely on sentence-transformers to handle caching usually,
             # but we can force a path if needed. For now let it cache in default location or set via env.
             # Docker volume for caching would be good: /app/models or /root/.cache
-            print(f"Loading embedding model {MODEL_NAME}...")
-            _model = SentenceTransformer(MODEL_NAME)
+            print(f"Loading embedding model {MODEL_NAME} ({EMBEDDING_BACKEND})...")
+            if EMBEDDING_BACKEND == "torch":
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME)
+            else:
+                from libs.embeddings.onnx_backend import OnnxEmbedder
+                _model = OnnxEmbedder(variant=EMBEDDING_BACKEND)
         except Exception as e:
             print(f"Error loading embedding model: {e}")
     return _model
 
-def generate_embedding(text):
+def encode_texts(texts, batch_size=EMBED_BATCH_SIZE):
     """
-    Generate 384-dim embedding for text.
-    Returns list of floats.
+    Run the local model over `texts`, uncached. Texts are grouped by length
+    so each batch pads to similar lengths.
+    Returns a float32 array of shape (len(texts), 384) in input order,
+    or None if the model is unavailable or encoding fails.
     """
     model = get_model()
-    if not model or not text:
+    if not model:
         return None
         
     try:
-        # Generate embedding
-        embedding = model.encode(text)
-        return embedding.tolist()
+        embeddings = np.empty((len(texts), model.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Longest first: a batch of similar lengths wastes little on padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            embeddings[batch] = model.encode([texts[i] for i in batch], batch_size=len(batch), convert_to_numpy=True)
+        return embeddings
     except Exception as e:
         print(f"Embedding error: {e}")
         return None
+
+def encode_remote(texts):
+    """
+    Encode `texts` on the embedding server (services/embedding_server).
+    Returns a float32 array, or None if the server is unreachable.
+    """
+    try:
+        response = _server_session.post(
+            f"{EMBEDDING_SERVER_URL.rstrip('/')}/embed",
+            json={"texts": texts},
+            timeout=EMBEDDING_SERVER_TIMEOUT
+        )
+        response.raise_for_status()
+        return np.asarray(response.json()["embeddings"], dtype=np.float32).reshape(len(texts), EMBEDDING_DIM)
+    except Exception as e:
+        print(f"Embedding server error: {e}")
+        return None
+
+def generate_embeddings(texts, batch_size=EMBED_BATCH_SIZE):
+    """
+    Generate 384-dim embeddings for many texts.
+    Cached texts (libs/embeddings/cache.py) skip the model; the rest go to the
+    embedding server if EMBEDDING_SERVER_URL is set, else to the local model.
+    Returns a float32 array of shape (len(texts), 384) in input order,
+    or None if encoding fails.
+    """
+    texts = list(texts)
+    cached = _cache.get_many(texts)
+    missing = [i for i, embedding in enumerate(cached) if embedding is None]
+    embeddings = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    for i, embedding in enumerate(cached):
+        if embedding is not None:
+            embeddings[i] = embedding
+    if not missing:
+        return embeddings
+    
+    missing_texts = [texts[i] for i in missing]
+    if EMBEDDING_SERVER_URL:
+        fresh = encode_remote(missing_texts)
+    else:
+        fresh = encode_texts(missing_texts, batch_size)
+    if fresh is None:
+        return None
+    
+    embeddings[missing] = fresh
+    _cache.put_many(missing_texts, fresh)
+    return embeddings
+
+def generate_embedding(text):
+    """
+    Generate 384-dim embedding for text.
+    Returns list of floats.
+    """
+    if not text:
+        return None
+    embeddings = generate_embeddings([text])
+    return embeddings[0].tolist() if embeddings is not None else None
@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+
+# ONNX Runtime version of all-MiniLM-L6-v2 (see scripts/export_onnx_embedder.py).
+# Reproduces the sentence-transformers pipeline: BERT -> mean pooling over the
+# attention mask -> L2 normalization, so vectors stay 384-dim and comparable
+# with ones already stored from the torch model.
+ONNX_MODEL_DIR = os.getenv(
+    "EMBEDDING_ONNX_DIR",
+    os.path.join(os.path.dirname(__file__), '../../models/onnx/all-MiniLM-L6-v2')
+)
+ONNX_MODEL_FILES = {"onnx": "model.onnx", "onnx-int8": "model.int8.onnx"}
+# Same truncation as the sentence-transformers model config
+MAX_SEQ_LENGTH = 256
+
+class OnnxEmbedder:
+    """
+    Drop-in for the parts of SentenceTransformer the embedder uses:
+    encode() and get_sentence_embedding_dimension().
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, variant="onnx"):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = os.getenv("EMBEDDING_ONNX_THREADS")
+        if threads:
+            options.intra_op_num_threads = int(threads)
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILES[variant]),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        mask = feeds["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        batches = [self._encode_batch(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        embeddings = np.concatenate(batches).astype(np.float32) if batches else np.empty((0, self.dimension), dtype=np.float32)
+        return embeddings[0] if single else embeddings
@@ -0,0 +1,166 @@
+import os
+import re
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from libs.text_cleaning.cleaner import clean_html, normalize_text
+
+# Main-content extraction with lxml. Order of attempts:
+#   1. per-source CSS selectors for outlets we crawl (SOURCE_SELECTORS)
+#   2. generic article containers (<article>, itemprop=articleBody, ...)
+#   3. paragraph-density scoring over the boilerplate-stripped tree
+#   4. clean_html (all visible text) if nothing yields MIN_CONTENT_CHARS
+# HTML_EXTRACTOR=bs4 switches back to clean_html only.
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "lxml")
+MIN_CONTENT_CHARS = int(os.getenv("EXTRACT_MIN_CONTENT_CHARS", "200"))
+# Paragraphs shorter than this (bylines, captions, "Read more") do not score
+MIN_PARAGRAPH_CHARS = 25
+
+# Keyed by source name as in services.crawler.main.SOURCES. Only outlets whose
+# article markup is known; others go through generic detection. A selector
+# that stops matching falls through to the next step, so stale entries only
+# cost speed, not content.
+SOURCE_SELECTORS = {
+    "Prothom Alo": ["div.story-element-text"],
+    "BBC News": ["article [data-component=text-block]"],
+    "Al Jazeera": ["div.wysiwyg"],
+    "Reuters": ["[data-testid^=paragraph-]"],
+}
+
+GENERIC_SELECTORS = [
+    "[itemprop=articleBody]",
+    "article",
+    "main",
+    "div.article-body",
+    "div.entry-content",
+    "div.post-content",
+]
+
+# Never content
+DROP_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "form",
+    "button", "input", "select", "textarea", "nav", "footer", "header", "aside",
+]
+# class/id fragments of navigation, sharing, ads and related-story blocks
+BOILERPLATE = re.compile(
+    r"(^|[-_\s])(nav|navbar|menu|footer|header|sidebar|breadcrumb|share|sharing|social|"
+    r"related|recommend|more-news|read-more|also-read|trending|popular|tags?|comments?|"
+    r"advert|ads?|ad-slot|sponsor|promo|newsletter|subscribe|cookie|banner|popup|modal)($|[-_\s])",
+    re.IGNORECASE
+)
+BLOCK_TAGS = {"p", "h1", "h2", "h3", "h4", "li", "blockquote", "pre", "td", "figcaption"}
+
+_compiled = {}
+
+def _selector(css):
+    if css not in _compiled:
+        _compiled[css] = CSSSelector(css)
+    return _compiled[css]
+
+def _parse(html_content):
+    # lxml refuses str input carrying an XML encoding declaration (XHTML pages)
+    if isinstance(html_content, str) and html_content.lstrip().startswith("<?xml"):
+        html_content = html_content.encode("utf-8")
+    if isinstance(html_content, bytes):
+        parser = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True)
+        return lxml.html.document_fromstring(html_content, parser=parser)
+    return lxml.html.document_fromstring(html_content, parser=lxml.html.HTMLParser(remove_comments=True))
+
+def _paragraph_count(node):
+    return sum(1 for p in node.iter("p") if len(p.text_content().strip()) >= MIN_PARAGRAPH_CHARS)
+
+def _strip_boilerplate(root):
+    etree.strip_elements(root, *DROP_TAGS, with_tail=False)
+    total = _paragraph_count(root)
+    marked = []
+    for element in root.iter(tag=etree.Element):
+        marker = f"{element.get('class', '')} {element.get('id', '')}"
+        if element.tag not in ("html", "body") and BOILERPLATE.search(marker):
+            marked.append(element)
+    for element in marked:
+        # A page wrapper with a "menu-open"-style class holds the story too
+        if element.getparent() is not None and _paragraph_count(element) * 2 <= total:
+            element.drop_tree()
+
+def _block_text(node):
+    """
+    Text of a content node, one normalized chunk per block element.
+    """
+    blocks = [
+        normalize_text(element.text_content())
+        for element in node.iter(tag=etree.Element)
+        if element.tag in BLOCK_TAGS and not any(a.tag in BLOCK_TAGS for a in element.iterancestors())
+    ]
+    text = " ".join(block for block in blocks if block)
+    # Containers that hold their text outside block tags
+    return text if text else normalize_text(node.text_content())
+
+def _link_density(node):
+    text_length = len(node.text_content()) or 1
+    link_length = sum(len(a.text_content()) for a in node.iter("a"))
+    return link_length / text_length
+
+def _best_scoring_node(root):
+    """
+    Readability-style scoring: each paragraph credits its parent and, at half
+    weight, its grandparent; scores are discounted by link density.
+    """
+    scores = {}
+    for paragraph in root.iter("p"):
+        length = len(normalize_text(paragraph.text_content()))
+        if length < MIN_PARAGRAPH_CHARS:
+            continue
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0) + length
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + length / 2
+
+    if not scores:
+        return None
+    return max(scores, key=lambda node: scores[node] * (1 - _link_density(node)))
+
+def _select(root, selectors):
+    for css in selectors:
+        nodes = _selector(css)(root)
+        if nodes:
+            text = " ".join(_block_text(node) for node in nodes)
+            if len(text) >= MIN_CONTENT_CHARS:
+                return text
+    return None
+
+def extract_main_text(html_content, source_name=None):
+    """
+    Main article text of an HTML page, without navigation, footers and
+    related-story blocks. Falls back to clean_html if extraction finds too
+    little text or the page cannot be parsed.
+    """
+    if not html_content:
+        return ""
+    if HTML_EXTRACTOR != "lxml":
+        return clean_html(html_content)
+
+    try:
+        root = _parse(html_content)
+        # Source selectors run before stripping: some outlets use "tags"/"share"
+        # style class names on wrappers around the story
+        text = _select(root, SOURCE_SELECTORS.get(source_name, []))
+        if text is None:
+            _strip_boilerplate(root)
+            text = _select(root, GENERIC_SELECTORS)
+        if text is None:
+            node = _best_scoring_node(root)
+            if node is not None:
+                candidate = _block_text(node)
+                if len(candidate) >= MIN_CONTENT_CHARS:
+                    text = candidate
+        if text:
+            return text
+    except (etree.ParserError, ValueError) as e:
+        print(f"lxml extraction failed, using fallback: {e}")
+
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode("utf-8", errors="ignore")
+    return clean_html(html_content)
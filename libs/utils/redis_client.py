@@ -0,0 +1,13 @@
+import redis
+from libs.utils.config import get_redis_url
+
+_client = None
+
+def get_redis():
+    """
+    Shared Redis client for caches and crawl state (lazy, one pool per process).
+    """
+    global _client
+    if _client is None:
+        _client = redis.from_url(get_redis_url())
+    return _client
@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import sys
+import time
+from libs.text_cleaning.cleaner import clean_html
+from libs.text_cleaning.extractor import extract_main_text
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "html")
+
+def load_corpus(directory):
+    """
+    (name, html, source_name) for every .html file in `directory`; source
+    names come from an optional manifest.json {filename: source_name}.
+    """
+    manifest_path = os.path.join(directory, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), "rb") as f:
+                html = f.read().decode("utf-8", errors="ignore")
+            corpus.append((name, html, manifest.get(name)))
+    return corpus
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare clean_html and extract_main_text on an HTML corpus")
+    parser.add_argument("--dir", default=FIXTURE_DIR, help="Directory of .html pages (default: bundled fixtures)")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per page per engine")
+    parser.add_argument("--show", action="store_true", help="Print the start of each extracted text")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.dir)
+    if not corpus:
+        print(f"No .html files in {args.dir}")
+        sys.exit(1)
+
+    print(f"{'page':<32} {'bs4 ms':>8} {'lxml ms':>8} {'bs4 chars':>10} {'lxml chars':>10}")
+    totals = {"bs4_ms": 0.0, "lxml_ms": 0.0, "bs4_chars": 0, "lxml_chars": 0}
+    for name, html, source_name in corpus:
+        baseline, baseline_ms = timed(lambda: clean_html(html), args.repeat)
+        extracted, extracted_ms = timed(lambda: extract_main_text(html, source_name), args.repeat)
+        totals["bs4_ms"] += baseline_ms
+        totals["lxml_ms"] += extracted_ms
+        totals["bs4_chars"] += len(baseline)
+        totals["lxml_chars"] += len(extracted)
+        print(f"{name[:32]:<32} {baseline_ms:>8.2f} {extracted_ms:>8.2f} {len(baseline):>10} {len(extracted):>10}")
+        if args.show:
+            print(f"    {extracted[:200]}")
+
+    print(f"{'total':<32} {totals['bs4_ms']:>8.2f} {totals['lxml_ms']:>8.2f} {totals['bs4_chars']:>10} {totals['lxml_chars']:>10}")
+    if totals["lxml_ms"] and totals["bs4_chars"]:
+        print(f"Speedup: {totals['bs4_ms'] / totals['lxml_ms']:.1f}x, "
+              f"output size: {totals['lxml_chars'] / totals['bs4_chars']:.0%} of clean_html")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import torch
+from sentence_transformers import SentenceTransformer
+from onnxruntime.quantization import quantize_dynamic, QuantType
+from libs.embeddings.embedder import MODEL_NAME
+from libs.embeddings.onnx_backend import ONNX_MODEL_DIR, ONNX_MODEL_FILES
+
+def export(output_dir):
+    """
+    Export the transformer of MODEL_NAME to ONNX (token embeddings output;
+    pooling and normalization happen in OnnxEmbedder) plus a dynamically
+    quantized int8 copy, and save the fast tokenizer next to them.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Loading {MODEL_NAME}...")
+    transformer = SentenceTransformer(MODEL_NAME, device="cpu")[0]
+    model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["Dhaka stock exchange closes higher", "ঢাকা"], padding=True, return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, ONNX_MODEL_FILES["onnx"])
+    print(f"Exporting to {fp32_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in names),
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    int8_path = os.path.join(output_dir, ONNX_MODEL_FILES["onnx-int8"])
+    print(f"Quantizing to {int8_path}...")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print("Export complete. Check it with scripts/verify_onnx_embedder.py.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX (fp32 and int8)")
+    parser.add_argument("--output-dir", default=ONNX_MODEL_DIR)
+    args = parser.parse_args()
+    try:
+        export(args.output_dir)
+    except Exception as e:
+        print(f"Export failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 from fastapi import FastAPI, HTTPException, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from services.api.models import Base, Article, Entity, ArticleEntity
-from services.api.schemas import ArticleResponse, SearchRequest
+from services.api.models import Base, Article, Entity, ArticleEntity, PROCESSING_STAGES
+from services.api.schemas import ArticleResponse, SearchRequest, DeadLetterResponse
 from sqlalchemy import create_engine, or_, text
 from sqlalchemy.orm import sessionmaker, joinedload
 import os
+import uuid
 from typing import List, Optional
 from libs.embeddings.embedder import generate_embedding
 from libs.utils.config import get_database_url
@@ -99,6 +100,106 @@ def get_status(db: Session = Depends(get_db)):
         "timestamp": datetime.datetime.now().isoformat()
     }
 
+@app.get("/backfill")
+def get_backfill_status():
+    """Progress and throughput of sitemap backfills"""
+    from services.crawler.backfill import list_backfills
+    try:
+        return list_backfills()
+    except Exception as e:
+        print(f"Backfill status error: {e}")
+        raise HTTPException(status_code=503, detail="Backfill state unavailable")
+
+@app.get("/processor")
+def get_processor_status():
+    """Processing queue depth and throughput gauges"""
+    from services.processor.gauges import get_processor_state
+    try:
+        return get_processor_state()
+    except Exception as e:
+        print(f"Processor status error: {e}")
+        raise HTTPException(status_code=503, detail="Processor state unavailable")
+
+@app.get("/embedding-cache")
+def get_embedding_cache_status():
+    """Embedding cache hit/miss counters across processor and API workers"""
+    from libs.embeddings.cache import get_cache_stats
+    try:
+        return get_cache_stats()
+    except Exception as e:
+        print(f"Embedding cache status error: {e}")
+        raise HTTPException(status_code=503, detail="Embedding cache state unavailable")
+
+def _dead_stages(article):
+    return [stage for stage in PROCESSING_STAGES if getattr(article, f"{stage}_status") == "dead"]
+
+@app.get("/dead-letter", response_model=List[DeadLetterResponse])
+def list_dead_letter(skip: int = 0, limit: int = Query(50, le=500), db: Session = Depends(get_db)):
+    """Articles quarantined after repeated processing failures"""
+    dead = or_(*[getattr(Article, f"{stage}_status") == "dead" for stage in PROCESSING_STAGES])
+    articles = db.query(Article).filter(dead).order_by(Article.created_at.desc()).offset(skip).limit(limit).all()
+    return [
+        DeadLetterResponse(
+            id=article.id,
+            source=article.source,
+            title=article.title,
+            url=article.url,
+            created_at=article.created_at,
+            dead_stages=_dead_stages(article),
+            failure_count=article.failure_count or 0,
+            last_error=article.last_error,
+        )
+        for article in articles
+    ]
+
+def _requeue(article):
+    requeued = [stage for stage in PROCESSING_STAGES if getattr(article, f"{stage}_status") in ("dead", "failed")]
+    for stage in requeued:
+        setattr(article, f"{stage}_status", None)
+        setattr(article, f"{stage}_leased_until", None)
+    article.failure_count = 0
+    article.next_retry_at = None
+    return requeued
+
+@app.post("/dead-letter/requeue")
+def requeue_dead_letter_bulk(
+    stage: Optional[str] = None,
+    error_prefix: Optional[str] = None,
+    limit: int = Query(1000, le=10000),
+    db: Session = Depends(get_db)
+):
+    """Requeue quarantined articles in bulk, optionally only those dead in `stage`
+    or whose last error starts with `error_prefix` (e.g. after an outage)"""
+    if stage is not None and stage not in PROCESSING_STAGES:
+        raise HTTPException(status_code=400, detail=f"Unknown stage: {stage}")
+    stages = [stage] if stage else PROCESSING_STAGES
+    query = db.query(Article).filter(or_(*[getattr(Article, f"{name}_status") == "dead" for name in stages]))
+    if error_prefix:
+        query = query.filter(Article.last_error.startswith(error_prefix, autoescape=True))
+    articles = query.order_by(Article.created_at).limit(limit).all()
+    for article in articles:
+        _requeue(article)
+    db.commit()
+    
+    from services.processor.events import publish_new_articles
+    publish_new_articles([article.id for article in articles])
+    return {"requeued": len(articles)}
+
+@app.post("/dead-letter/{article_id}/requeue")
+def requeue_dead_letter(article_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Reset a quarantined article so its failed stages run again"""
+    article = db.query(Article).filter(Article.id == article_id).first()
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    
+    requeued = _requeue(article)
+    db.commit()
+    
+    # Stream consumer picks it up now; the periodic scan would otherwise
+    from services.processor.events import publish_new_articles
+    publish_new_articles([article.id])
+    return {"id": str(article.id), "requeued_stages": requeued}
+
 @app.get("/stats")
 def get_stats(db: Session = Depends(get_db)):
     """Detailed statistics about articles and processing"""
@@ -113,6 +214,17 @@ def get_stats(db: Session = Depends(get_db)):
     with_summary = db.query(Article).filter(Article.summary_text.isnot(None)).count()
     with_embedding = db.query(Article).filter(Article.embedding.isnot(None)).count()
     
+    # Near-duplicate detection
+    fingerprinted = db.query(Article).filter(Article.simhash.isnot(None)).count()
+    duplicates = db.query(Article).filter(Article.duplicate_of.isnot(None)).count()
+    
+    # Per-stage status counts (NULL = pending)
+    stage_status = {}
+    for stage in PROCESSING_STAGES:
+        column = getattr(Article, f"{stage}_status")
+        rows = db.query(column, func.count(Article.id)).group_by(column).all()
+        stage_status[stage] = {(status or "pending"): count for status, count in rows}
+    
     # Count by source
     sources = db.query(
         Article.source,
@@ -139,6 +251,12 @@ def get_stats(db: Session = Depends(get_db)):
             "summarized": with_summary,
             "embedded": with_embedding,
         },
+        "stage_status": stage_status,
+        "deduplication": {
+            "fingerprinted": fingerprinted,
+            "duplicates": duplicates,
+            "dedup_rate": round(duplicates / fingerprinted, 4) if fingerprinted else 0.0,
+        },
         "by_source": source_stats,
         "by_category": category_stats,
     }
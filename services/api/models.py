@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, UniqueConstraint, BigInteger, SmallInteger, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -8,15 +8,25 @@ import uuid
 
 Base = declarative_base()
 
+# Processing stages in pipeline order; each has <name>_status/_version/_leased_until
+# columns on articles (services/processor/stages.py)
+PROCESSING_STAGES = ("clean", "dedup", "language", "category", "entities", "summary", "embedding")
+
 class Article(Base):
     __tablename__ = "articles"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     url = Column(String, unique=True, nullable=False, index=True)
+    # De-duplication key: canonicalized URL / rel=canonical (services/crawler/canonical.py)
+    canonical_url = Column(String, unique=True, nullable=True, index=True)
     source = Column(String, nullable=False)
     title = Column(String, nullable=False)
     published_at = Column(DateTime(timezone=True), nullable=True)
     raw_storage_path = Column(String, nullable=True)
+    # Set once the raw body is packed into a WARC segment (see services/crawler/raw_segments.py)
+    raw_segment = Column(String, nullable=True)
+    raw_offset = Column(BigInteger, nullable=True)
+    raw_length = Column(BigInteger, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Fields for future phases (nullable for now)
@@ -29,6 +39,40 @@ class Article(Base):
     summary_text = Column(Text, nullable=True)
     summary_bullets = Column(Text, nullable=True)
     embedding = Column(Vector(384))
+    # Near-duplicate detection: signed 64-bit SimHash of cleaned_text, and the
+    # canonical article whose summary/embedding/entities this one reuses
+    simhash = Column(BigInteger, nullable=True)
+    duplicate_of = Column(UUID(as_uuid=True), ForeignKey('articles.id'), nullable=True, index=True)
+    # Per-stage processing state (services/processor/stages.py): status is
+    # NULL (pending), 'done', 'empty', 'failed' or 'dead'; version is the stage version
+    # that produced the current output, leased_until the claim of the worker
+    # currently running the stage
+    clean_status = Column(String, nullable=True)
+    clean_version = Column(SmallInteger, nullable=True)
+    clean_leased_until = Column(DateTime(timezone=True), nullable=True)
+    dedup_status = Column(String, nullable=True)
+    dedup_version = Column(SmallInteger, nullable=True)
+    dedup_leased_until = Column(DateTime(timezone=True), nullable=True)
+    language_status = Column(String, nullable=True)
+    language_version = Column(SmallInteger, nullable=True)
+    language_leased_until = Column(DateTime(timezone=True), nullable=True)
+    category_status = Column(String, nullable=True)
+    category_version = Column(SmallInteger, nullable=True)
+    category_leased_until = Column(DateTime(timezone=True), nullable=True)
+    entities_status = Column(String, nullable=True)
+    entities_version = Column(SmallInteger, nullable=True)
+    entities_leased_until = Column(DateTime(timezone=True), nullable=True)
+    summary_status = Column(String, nullable=True)
+    summary_version = Column(SmallInteger, nullable=True)
+    summary_leased_until = Column(DateTime(timezone=True), nullable=True)
+    embedding_status = Column(String, nullable=True)
+    embedding_version = Column(SmallInteger, nullable=True)
+    embedding_leased_until = Column(DateTime(timezone=True), nullable=True)
+    # Failure tracking: consecutive stage failures, the latest error and when
+    # the article may be retried; at the limit the failing stage goes 'dead'
+    failure_count = Column(Integer, nullable=False, server_default="0", default=0)
+    last_error = Column(Text, nullable=True)
+    next_retry_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     entities = relationship("Entity", secondary="article_entities", back_populates="articles")
@@ -46,6 +90,16 @@ class Entity(Base):
     # Relationships
     articles = relationship("Article", secondary="article_entities", back_populates="entities")
 
+class SimhashBand(Base):
+    __tablename__ = "simhash_bands"
+    
+    # LSH buckets of canonical articles' SimHash fingerprints (libs/dedup/simhash.py).
+    # Rows older than the near-dup window are pruned (services/processor/near_dup.py)
+    band = Column(SmallInteger, primary_key=True)
+    value = Column(SmallInteger, primary_key=True)
+    article_id = Column(UUID(as_uuid=True), ForeignKey('articles.id'), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
 class ArticleEntity(Base):
     __tablename__ = "article_entities"
     
@@ -29,6 +29,16 @@ class ArticleResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class DeadLetterResponse(BaseModel):
+    id: UUID
+    source: str
+    title: str
+    url: str
+    created_at: Optional[datetime] = None
+    dead_stages: List[str] = []
+    failure_count: int = 0
+    last_error: Optional[str] = None
+
 class SearchRequest(BaseModel):
     query: str
     type: str = "text" # "text" or "semantic"
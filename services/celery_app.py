@@ -2,7 +2,7 @@ import os
 from celery import Celery
 from celery.schedules import crontab
 from services.crawler.main import run_crawl
-from services.processor.main import run_process
+from services.processor.main import drain
 
 from libs.utils.config import get_redis_url
 
@@ -19,14 +19,27 @@ app.conf.update(
     enable_utc=True,
     # Worker settings
     worker_concurrency=2,
+    # Drain runs fan CPU work out to a process pool (services/processor/cpu_pool.py),
+    # which daemonic prefork children cannot start. process_task goes to its own
+    # queue, served by a threads-pool worker (process-worker in docker-compose.yml)
+    task_routes={'process_task': {'queue': 'processing'}},
 )
 
+# Upper bound for one crawl cycle; the lock expires after this if a worker dies
+CRAWL_LOCK_TIMEOUT = 30 * 60
+
 @app.task(name='crawl_task')
 def crawl_task():
     print("Running Crawl Task...")
     # Update status in Redis
     import redis
     r = redis.from_url(REDIS_URL)
+    
+    # Beat fires every minute; skip if the previous cycle is still running
+    if not r.set("bciip:crawl_lock", "1", nx=True, ex=CRAWL_LOCK_TIMEOUT):
+        print("Previous crawl still running, skipping.")
+        return "Crawl Skipped"
+    
     r.set("bciip:crawler_status", "running")
     r.set("bciip:last_run", run_crawl.__module__) # Just a dummy write, or use time
     
@@ -34,30 +47,93 @@ def crawl_task():
         run_crawl()
     finally:
         r.set("bciip:crawler_status", "idle")
+        r.delete("bciip:crawl_lock")
         
     return "Crawl Completed"
 
+# Concurrent drain chains; each holds one slot lock while it runs
+PROCESS_CHAINS = int(os.getenv("PROCESS_CHAINS", "1"))
+# Slot lock expiry if a worker dies mid-run (a drain run lasts PROCESS_TIME_BUDGET plus one batch)
+PROCESS_LOCK_TIMEOUT = 30 * 60
+
 @app.task(name='process_task', autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
 def process_task():
     print("Running Process Task...")
-    run_process()
-    return "Process Completed"
+    import redis
+    r = redis.from_url(REDIS_URL)
+    
+    # Beat fires every 5 minutes; only start a chain if a slot is free
+    slot = next((f"bciip:process_lock:{i}" for i in range(PROCESS_CHAINS)
+                 if r.set(f"bciip:process_lock:{i}", "1", nx=True, ex=PROCESS_LOCK_TIMEOUT)), None)
+    if slot is None:
+        print("All processing chains busy, skipping.")
+        return "Process Skipped"
+    
+    try:
+        processed, backlog_left = drain()
+    finally:
+        r.delete(slot)
+    
+    # Backlog left after a productive run: continue right away instead of
+    # waiting for the next beat
+    if processed and backlog_left:
+        process_task.delay()
+        return f"Processed {processed}, chained ({backlog_left} pending)"
+    return f"Processed {processed}"
 
 @app.task(name='backfill_task')
-def backfill_task(url: str, source: str):
+def backfill_task(url: str, source: str, restart: bool = False):
     print(f"Running Backfill Task for {source}...")
-    from services.crawler.sitemap_fetcher import fetch_sitemap
-    fetch_sitemap(url, source)
-    return f"Backfill for {source} Completed"
+    from services.crawler.backfill import plan_backfill
+    # Walk the sitemap and fan chunks out to backfill_chunk_task; resumes from the Redis checkpoint
+    chunks = plan_backfill(url, source, dispatch=lambda s, chunk: backfill_chunk_task.delay(s, chunk), restart=restart)
+    return f"Backfill for {source} dispatched {chunks} chunks"
+
+class BackfillChunkTask(app.Task):
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        # Out of retries: keep the chunk so the next backfill run retries it
+        # and the backfill is not reported as done
+        from services.crawler.backfill import record_failed_chunk
+        source, candidates = args
+        record_failed_chunk(source, candidates, repr(exc))
+
+# Acked only once the chunk finishes: a chunk whose worker was killed is
+# redelivered, so it is always counted as done or failed and the backfill
+# cannot hang in "dispatched"
+@app.task(name='backfill_chunk_task', base=BackfillChunkTask, autoretry_for=(Exception,), retry_backoff=True, max_retries=3,
+          acks_late=True, reject_on_worker_lost=True)
+def backfill_chunk_task(source: str, candidates: list):
+    from services.crawler.backfill import run_chunk
+    imported = run_chunk(source, candidates)
+    return f"Backfill chunk for {source} imported {imported}"
+
+@app.task(name='prune_near_dup_index_task')
+def prune_near_dup_index_task():
+    from services.processor.main import SessionLocal
+    from services.processor.near_dup import prune_fingerprints
+    session = SessionLocal()
+    try:
+        pruned = prune_fingerprints(session)
+    finally:
+        session.close()
+    return f"Pruned {pruned} SimHash band rows"
 
 # Periodic Schedule
 app.conf.beat_schedule = {
-    'crawl-every-10-mins': {
+    # Polls only the sources that are due (services/crawler/scheduler.py)
+    'crawl-due-sources-every-minute': {
         'task': 'crawl_task',
-        'schedule': crontab(minute='*/10'),
+        'schedule': crontab(minute='*'),
     },
-    'process-every-5-mins': {
+    # Safety net behind the stream consumer (services/processor/consumer.py):
+    # picks up missed events, retries and backfill bursts by scanning for pending rows
+    'process-backlog-every-5-mins': {
         'task': 'process_task',
         'schedule': crontab(minute='*/5'),
     },
+    # Keeps the near-duplicate LSH index to NEAR_DUP_WINDOW_DAYS
+    'prune-near-dup-index-daily': {
+        'task': 'prune_near_dup_index_task',
+        'schedule': crontab(minute=30, hour=3),
+    },
 }
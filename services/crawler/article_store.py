@@ -0,0 +1,57 @@
+import uuid
+from sqlalchemy.dialects.postgresql import insert
+from services.api.models import Article
+from services.crawler.url_filter import mark_seen
+from services.processor.events import publish_new_articles
+
+def insert_articles(session, source_name, records):
+    """
+    Bulk insert new article metadata in one statement.
+    Rows whose URL or canonical URL already exists (e.g. inserted by a
+    concurrent crawler) are silently dropped instead of failing the whole batch.
+    Each record needs url, canonical_url, title, published_at and raw_storage_path.
+    Returns [(id, url)] for the rows actually inserted; the caller commits.
+    """
+    if not records:
+        return []
+
+    rows = [{
+        "id": uuid.uuid4(),
+        "url": record["url"],
+        "canonical_url": record["canonical_url"],
+        "source": source_name,
+        "title": record["title"],
+        "published_at": record["published_at"],
+        "raw_storage_path": record["raw_storage_path"],
+    } for record in records]
+
+    stmt = insert(Article).values(rows) \
+        .on_conflict_do_nothing() \
+        .returning(Article.id, Article.url)
+    return [(row.id, row.url) for row in session.execute(stmt)]
+
+def save_articles(session_factory, source_name, records):
+    """
+    Insert records in their own transaction, record the URLs as seen and
+    announce the new articles to the processor.
+    Returns the number of newly inserted articles.
+    """
+    if not records:
+        return 0
+
+    session = session_factory()
+    try:
+        inserted = insert_articles(session, source_name, records)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    # Conflicting URLs are already stored too, so all of them count as seen
+    seen = [record["canonical_url"] for record in records]
+    seen += [record["alias_url"] for record in records if record.get("alias_url")]
+    mark_seen(seen)
+    publish_new_articles([article_id for article_id, _ in inserted])
+    return len(inserted)
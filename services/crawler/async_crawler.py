@@ -0,0 +1,134 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlparse
+from services.crawler import rss_fetcher
+from services.crawler.feed_cache import save_validators
+from services.crawler.canonical import apply_rel_canonical
+
+# Concurrency caps. The global cap bounds open connections/threads for the whole
+# crawl, the per-host cap keeps us polite towards any single outlet.
+CRAWL_MAX_CONCURRENCY = int(os.getenv("CRAWL_MAX_CONCURRENCY", "32"))
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "4"))
+
+class CrawlLimiter:
+    """
+    Runs blocking crawl I/O (feedparser, requests, MinIO, DB) on a bounded
+    thread pool, with a global cap and a per-host cap on in-flight fetches.
+    """
+
+    def __init__(self, max_concurrency=CRAWL_MAX_CONCURRENCY, per_host=CRAWL_PER_HOST_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._hosts = {}
+        # One extra worker so DB writes never queue behind a full set of fetches
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency + 1, thread_name_prefix="crawl")
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).hostname or ""
+        semaphore = self._hosts.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host)
+            self._hosts[host] = semaphore
+        return semaphore
+
+    async def offload(self, func, *args):
+        """
+        Run a blocking call on the crawl pool without host limits (DB work).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    async def fetch(self, url, func, *args):
+        """
+        Run a blocking network call against `url` under the host and global caps.
+        The host slot is taken first so a slow host never holds global slots while waiting.
+        """
+        async with self._host_semaphore(url):
+            async with self._global:
+                return await self.offload(func, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+async def crawl_feed(source_name, rss_url, limiter):
+    """
+    Crawl one feed: parse it, drop known URLs, download new articles
+    concurrently and save them.
+    Returns (imported_count, unchanged) where unchanged means the feed was skipped.
+    """
+    print(f"Fetching {source_name} from {rss_url}...")
+    feed, validators = await limiter.fetch(rss_url, rss_fetcher.parse_feed, rss_url)
+    if feed is None:
+        await limiter.offload(save_validators, rss_url, validators)
+        print(f"{source_name} unchanged since last crawl, skipped.")
+        return 0, True
+
+    candidates = []
+    for entry in feed.entries:
+        try:
+            candidates.append(rss_fetcher.entry_to_candidate(entry, source_name))
+        except Exception as e:
+            print(f"Error processing entry {entry.get('link', 'unknown')}: {e}")
+
+    new_candidates = await limiter.offload(rss_fetcher.filter_new_candidates, candidates)
+    records = await download_candidates(source_name, new_candidates, limiter)
+
+    count = await limiter.offload(rss_fetcher.save_articles, source_name, records)
+    # Only remember this feed version once every new entry made it in
+    if len(records) == len(new_candidates):
+        await limiter.offload(save_validators, rss_url, validators)
+    print(f"Imported {count} new articles from {source_name}")
+    return count, False
+
+async def download_candidates(source_name, candidates, limiter):
+    """
+    Download and store all candidates concurrently.
+    Returns the candidates that were stored, with raw_storage_path set and
+    canonical_url replaced by the page's rel=canonical when it is trustworthy.
+    """
+    results = await asyncio.gather(*[
+        limiter.fetch(c["url"], rss_fetcher.download_and_store, c["url"])
+        for c in candidates
+    ], return_exceptions=True)
+
+    records = []
+    for candidate, result in zip(candidates, results):
+        if isinstance(result, Exception):
+            print(f"Failed to fetch content for {candidate['url']}: {result}")
+            continue
+        candidate["raw_storage_path"], rel_canonical = result
+        records.append(apply_rel_canonical(candidate, rel_canonical, source_name))
+    return records
+
+async def crawl_sources(sources, limiter=None):
+    """
+    Crawl all (name, url) sources concurrently.
+    Returns (counts, skipped): counts is {source_name: imported_count} with failed
+    sources reported as None, skipped lists the sources whose feed was unchanged.
+    """
+    own_limiter = limiter is None
+    if own_limiter:
+        limiter = CrawlLimiter()
+
+    try:
+        results = await asyncio.gather(*[
+            crawl_feed(name, url, limiter) for name, url in sources
+        ], return_exceptions=True)
+    finally:
+        if own_limiter:
+            limiter.shutdown()
+
+    counts = {}
+    skipped = []
+    for (name, _), result in zip(sources, results):
+        if isinstance(result, Exception):
+            print(f"Failed to crawl {name}: {result}")
+            counts[name] = None
+            continue
+        counts[name], unchanged = result
+        if unchanged:
+            skipped.append(name)
+    return counts, skipped
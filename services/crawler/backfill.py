@@ -0,0 +1,191 @@
+import json
+import time
+from usp.objects.sitemap import InvalidSitemap
+from usp.tree import sitemap_tree_for_homepage
+from libs.utils.redis_client import get_redis
+from services.crawler.sitemap_fetcher import init_resources, iter_page_chunks, backfill_candidates, SITEMAP_CHUNK_SIZE
+
+# Resumable sitemap backfill. The planner walks the child sitemaps of a site
+# and hands each chunk of pages to its own Celery task; progress lives in a
+# Redis hash per source:
+#   url, status, started_at, finished_at, pages_dispatched, chunks_dispatched,
+#   chunks_done, chunks_failed, articles_imported, pages_failed, last_error
+# status: planning -> dispatched -> done (every child sitemap read and every
+# chunk imported) or incomplete (some sitemap or chunk failed); paused when
+# max_pages stopped the planner early.
+# The checkpoint is the set of child sitemap URLs fully dispatched, so a
+# rerun skips those even if the sitemap changed meanwhile, plus the number of
+# pages already dispatched from a sitemap max_pages cut short. A rerun retries
+# unreadable sitemaps and chunks whose task ran out of retries. Re-dispatching
+# a chunk is harmless because chunk imports are de-duplicated.
+BACKFILL_KEY_PREFIX = "bciip:backfill:"
+SITEMAPS_DONE_PREFIX = "bciip:backfill-sitemaps-done:"
+SITEMAP_OFFSETS_PREFIX = "bciip:backfill-sitemap-offsets:"
+SITEMAPS_FAILED_PREFIX = "bciip:backfill-sitemaps-failed:"
+FAILED_CHUNKS_PREFIX = "bciip:backfill-failed-chunks:"
+
+def _key(source_name):
+    return BACKFILL_KEY_PREFIX + source_name
+
+def _leaf_sitemaps(sitemap):
+    """
+    Child sitemaps that list pages, depth first.
+    """
+    sub_sitemaps = getattr(sitemap, "sub_sitemaps", None)
+    if isinstance(sitemap, InvalidSitemap) or not sub_sitemaps:
+        yield sitemap
+        return
+    for sub_sitemap in sub_sitemaps:
+        yield from _leaf_sitemaps(sub_sitemap)
+
+def get_backfill_state(source_name):
+    """
+    Current checkpoint for a source plus derived throughput figures.
+    """
+    raw = get_redis().hgetall(_key(source_name))
+    state = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+    if not state:
+        return {}
+
+    for field in ("pages_dispatched", "chunks_dispatched", "chunks_done", "chunks_failed", "articles_imported", "pages_failed"):
+        state[field] = int(state.get(field, 0))
+    r = get_redis()
+    state["sitemaps_done"] = r.scard(SITEMAPS_DONE_PREFIX + source_name)
+    state["sitemaps_failed"] = r.scard(SITEMAPS_FAILED_PREFIX + source_name)
+
+    started_at = float(state.get("started_at", time.time()))
+    elapsed = float(state.get("finished_at", time.time())) - started_at
+    state["elapsed_seconds"] = round(elapsed, 1)
+    state["articles_per_second"] = round(state["articles_imported"] / elapsed, 2) if elapsed > 0 else 0.0
+    return state
+
+def list_backfills():
+    states = {}
+    for key in get_redis().scan_iter(match=BACKFILL_KEY_PREFIX + "*"):
+        source_name = key.decode("utf-8")[len(BACKFILL_KEY_PREFIX):]
+        states[source_name] = get_backfill_state(source_name)
+    return states
+
+def plan_backfill(url, source_name, dispatch, restart=False, max_pages=None):
+    """
+    Walk the sitemap of `url` and call dispatch(source_name, chunk) for each
+    chunk of candidates not dispatched yet, after re-dispatching chunks that
+    failed last time. Stops after about `max_pages` pages (status paused; run
+    again to continue). Returns the number of chunks dispatched.
+    """
+    r = get_redis()
+    key = _key(source_name)
+    done_key = SITEMAPS_DONE_PREFIX + source_name
+    failed_key = SITEMAPS_FAILED_PREFIX + source_name
+    offsets_key = SITEMAP_OFFSETS_PREFIX + source_name
+    if restart:
+        r.delete(key, done_key, failed_key, offsets_key, FAILED_CHUNKS_PREFIX + source_name)
+
+    state = get_backfill_state(source_name)
+    if state.get("status") in ("dispatched", "done"):
+        print(f"Backfill for {source_name} already planned ({state['chunks_done']}/{state['chunks_dispatched']} chunks done).")
+        return 0
+
+    r.hset(key, mapping={"url": url, "status": "planning"})
+    r.hsetnx(key, "started_at", time.time())
+    r.hdel(key, "finished_at")
+
+    # Failed chunks are already counted in chunks_dispatched; their new
+    # outcome is counted again when the task finishes
+    dispatched = 0
+    while (raw := r.lpop(FAILED_CHUNKS_PREFIX + source_name)) is not None:
+        dispatch(source_name, json.loads(raw))
+        r.hincrby(key, "chunks_failed", -1)
+        dispatched += 1
+
+    init_resources()
+    print(f"Fetching sitemap for {url} ({r.scard(done_key)} child sitemaps already dispatched)...")
+    budget = max_pages
+    for sitemap in _leaf_sitemaps(sitemap_tree_for_homepage(url)):
+        if budget is not None and budget <= 0:
+            break
+        if r.sismember(done_key, sitemap.url):
+            continue
+        if isinstance(sitemap, InvalidSitemap):
+            print(f"Could not read sitemap {sitemap.url}: {sitemap.reason}")
+            r.sadd(failed_key, sitemap.url)
+            continue
+
+        pages = list(sitemap.all_pages())
+        offset = min(int(r.hget(offsets_key, sitemap.url) or 0), len(pages))
+        end = len(pages) if budget is None else min(len(pages), offset + budget)
+        for start in range(offset, end, SITEMAP_CHUNK_SIZE):
+            batch = pages[start:min(start + SITEMAP_CHUNK_SIZE, end)]
+            pipe = r.pipeline()
+            for chunk in iter_page_chunks(batch, size=len(batch)):
+                dispatch(source_name, chunk)
+                pipe.hincrby(key, "pages_dispatched", len(chunk))
+                pipe.hincrby(key, "chunks_dispatched", 1)
+                dispatched += 1
+            # Checkpoint only after the chunk is queued
+            pipe.hincrby(offsets_key, sitemap.url, len(batch))
+            pipe.execute()
+        if budget is not None:
+            budget -= end - offset
+        if end == len(pages):
+            pipe = r.pipeline()
+            pipe.sadd(done_key, sitemap.url)
+            pipe.srem(failed_key, sitemap.url)
+            pipe.hdel(offsets_key, sitemap.url)
+            pipe.execute()
+    else:
+        r.hset(key, "status", "dispatched")
+        print(f"Dispatched {dispatched} backfill chunks for {source_name}")
+        _finish_if_complete(source_name)
+        return dispatched
+
+    r.hset(key, "status", "paused")
+    print(f"Dispatched {dispatched} backfill chunks for {source_name}; stopped at {max_pages} pages, run again to continue")
+    return dispatched
+
+def run_chunk(source_name, candidates):
+    """
+    Import one dispatched chunk and record progress. Returns imported count.
+    """
+    init_resources()
+    imported, failed = backfill_candidates(source_name, candidates)
+
+    key = _key(source_name)
+    pipe = get_redis().pipeline()
+    pipe.hincrby(key, "chunks_done", 1)
+    pipe.hincrby(key, "articles_imported", imported)
+    pipe.hincrby(key, "pages_failed", failed)
+    pipe.execute()
+
+    state = _finish_if_complete(source_name)
+    print(f"Backfill {source_name}: chunk imported {imported}/{len(candidates)}; "
+          f"{state['chunks_done']}/{state['chunks_dispatched']} chunks, "
+          f"{state['articles_imported']} articles, {state['articles_per_second']} articles/s")
+    return imported
+
+def record_failed_chunk(source_name, candidates, error):
+    """
+    Keep a chunk whose task gave up, so the next plan_backfill run retries it.
+    """
+    key = _key(source_name)
+    pipe = get_redis().pipeline()
+    pipe.rpush(FAILED_CHUNKS_PREFIX + source_name, json.dumps(candidates))
+    pipe.hincrby(key, "chunks_failed", 1)
+    pipe.hset(key, "last_error", error)
+    pipe.execute()
+    _finish_if_complete(source_name)
+
+def _finish_if_complete(source_name):
+    state = get_backfill_state(source_name)
+    if state.get("status") == "dispatched" and state["chunks_done"] + state["chunks_failed"] >= state["chunks_dispatched"]:
+        covered = state["chunks_failed"] == 0 and state["sitemaps_failed"] == 0
+        r = get_redis()
+        r.hset(_key(source_name), mapping={"status": "done" if covered else "incomplete", "finished_at": time.time()})
+        state = get_backfill_state(source_name)
+        if covered:
+            print(f"Backfill for {source_name} complete: {state['articles_imported']} articles "
+                  f"in {state['elapsed_seconds']}s ({state['articles_per_second']} articles/s)")
+        else:
+            print(f"Backfill for {source_name} incomplete: {state['chunks_failed']} chunks and "
+                  f"{state['sitemaps_failed']} sitemaps failed; run it again to retry them")
+    return state
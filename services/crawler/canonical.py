@@ -0,0 +1,121 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, urljoin
+
+# URL canonicalization for de-duplication. The canonical form is a key, used for
+# dedupe lookups and stored in articles.canonical_url next to the fetched URL;
+# downloads still use the URL as published.
+
+# Query parameters that never identify an article
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "igshid", "yclid", "twclid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "ref", "ref_src", "ref_url", "referrer",
+    "cmpid", "ocid", "s_cid", "share", "from", "amp", "outputtype",
+}
+TRACKING_PREFIXES = ("utm_", "at_", "pk_", "hsa_")
+
+# Mobile / AMP / www host variants of the same site
+HOST_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+AMP_PATH = re.compile(r"(/amp)+/?$|^/amp(?=/)|\.amp$")
+
+# Per-source rules, keyed by source name as in services.crawler.main.SOURCES:
+#   drop_params: extra query params to drop
+#   keep_params: if set, the only query params kept (everything else is noise)
+# Only use keep_params for outlets whose article URLs never carry an ID in the
+# query string, otherwise distinct stories would collapse onto one key.
+SOURCE_RULES = {
+    "Prothom Alo": {"keep_params": set()},
+    "The Daily Star": {"keep_params": set()},
+    "BBC News": {"drop_params": {"intlink_from_url", "link_location", "xtor"}},
+    "Al Jazeera": {"drop_params": {"traffic_source", "sf"}},
+    "Reuters": {"drop_params": {"taid", "rpc", "edition-redirect"}},
+}
+
+LINK_TAG = re.compile(rb"<link\b[^>]*>", re.IGNORECASE)
+REL_CANONICAL = re.compile(rb"""\brel\s*=\s*["']?\s*canonical\b""", re.IGNORECASE)
+HREF = re.compile(rb"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+def _normalize_host(netloc):
+    host = netloc.rsplit("@", 1)[-1].lower().rstrip(".")
+    if host.endswith(":80") or host.endswith(":443"):
+        host = host.rsplit(":", 1)[0]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    return host
+
+def _normalize_path(path):
+    path = re.sub(r"/{2,}", "/", path or "/")
+    path = AMP_PATH.sub("", path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return path
+
+def _keep_param(name, rules):
+    lowered = name.lower()
+    if rules.get("keep_params") is not None:
+        return lowered in rules["keep_params"]
+    if lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PREFIXES):
+        return False
+    return lowered not in rules.get("drop_params", ())
+
+def canonicalize_url(url, source_name=None):
+    """
+    Canonical form of an article URL: https, bare lower-case host, no AMP
+    variant, no trailing slash or fragment, tracking params removed and the
+    remaining params sorted.
+    """
+    if not url:
+        return url
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ("http", "https"):
+        return url.strip()
+
+    rules = SOURCE_RULES.get(source_name, {})
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if _keep_param(k, rules)]
+    return urlunsplit((
+        "https",
+        _normalize_host(parts.netloc),
+        _normalize_path(parts.path),
+        urlencode(sorted(params)),
+        ""
+    ))
+
+def find_rel_canonical(head):
+    """
+    href of <link rel="canonical"> in the first bytes of an HTML page, or None.
+    """
+    for tag in LINK_TAG.findall(head):
+        if REL_CANONICAL.search(tag):
+            match = HREF.search(tag)
+            if match:
+                href = next(g for g in match.groups() if g is not None)
+                return href.decode("utf-8", errors="ignore").strip() or None
+    return None
+
+def resolve_rel_canonical(fetched_url, href, source_name=None):
+    """
+    Canonicalized rel=canonical target, or None when it should not be trusted:
+    other sites (syndication partners) and bare home pages, which some CMSs
+    emit for every article.
+    """
+    if not href:
+        return None
+    target = canonicalize_url(urljoin(fetched_url, href), source_name)
+    fetched = canonicalize_url(fetched_url, source_name)
+    if urlsplit(target).netloc != urlsplit(fetched).netloc:
+        return None
+    if urlsplit(target).path in ("", "/"):
+        return None
+    return target
+
+def apply_rel_canonical(candidate, href, source_name=None):
+    """
+    Switch a candidate's canonical_url to its page's rel=canonical. The
+    URL-derived key is kept as alias_url so it is marked as seen as well.
+    """
+    target = resolve_rel_canonical(candidate["url"], href, source_name)
+    if target and target != candidate["canonical_url"]:
+        candidate["alias_url"] = candidate["canonical_url"]
+        candidate["canonical_url"] = target
+    return candidate
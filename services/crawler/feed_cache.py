@@ -0,0 +1,70 @@
+import hashlib
+import os
+import feedparser
+from libs.utils.redis_client import get_redis
+from services.crawler import http_client
+
+# Per-feed HTTP validators: {"etag", "last_modified", "content_hash"}
+FEED_CACHE_PREFIX = "bciip:feed_cache:"
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", str(7 * 24 * 3600)))
+
+def load_validators(rss_url):
+    """
+    Return the cached validators for a feed, or {} if none (or Redis is down).
+    """
+    try:
+        cached = get_redis().hgetall(FEED_CACHE_PREFIX + rss_url)
+    except Exception as e:
+        print(f"Feed cache unavailable, fetching {rss_url} in full: {e}")
+        return {}
+    return {k.decode("utf-8"): v.decode("utf-8") for k, v in cached.items()}
+
+def save_validators(rss_url, validators):
+    """
+    Store validators once the feed's new entries have been persisted.
+    """
+    fields = {k: v for k, v in validators.items() if v}
+    if not fields:
+        return
+    try:
+        key = FEED_CACHE_PREFIX + rss_url
+        pipe = get_redis().pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, FEED_CACHE_TTL)
+        pipe.execute()
+    except Exception as e:
+        print(f"Could not update feed cache for {rss_url}: {e}")
+
+def fetch_feed(rss_url):
+    """
+    Conditional GET of a feed.
+    Returns (feed, validators); feed is None when the server answered 304 or
+    the body hash matches the last processed version.
+    """
+    cached = load_validators(rss_url)
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+
+    resp = http_client.get(rss_url, headers=headers)
+    if resp.status_code == 304:
+        return None, cached
+    resp.raise_for_status()
+
+    body = resp.content
+    validators = {
+        "etag": resp.headers.get("ETag", ""),
+        "last_modified": resp.headers.get("Last-Modified", ""),
+        "content_hash": hashlib.sha256(body).hexdigest(),
+    }
+    if cached.get("content_hash") == validators["content_hash"]:
+        return None, validators
+
+    feed = feedparser.parse(body, response_headers={
+        "content-location": resp.url,
+        "content-type": resp.headers.get("Content-Type", ""),
+    })
+    return feed, validators
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP client for all crawler downloads: pooled keep-alive connections,
+# retries with exponential backoff, a per-host token bucket and robots.txt checks.
+USER_AGENT = os.getenv("CRAWLER_USER_AGENT", "BCIIPBot/0.1 (+https://github.com/shaifulshabuj/BCIIP)")
+HTTP_TIMEOUT = (5, float(os.getenv("HTTP_READ_TIMEOUT", "15")))  # (connect, read)
+
+# Connection pool: number of hosts kept, and connections kept per host
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "64"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "8"))
+
+# Retries on 429/5xx; Retry-After is honored but capped so one host cannot stall a worker
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "1.0"))
+HTTP_MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "60"))
+
+# Per-host politeness: sustained requests/second and burst size
+HTTP_HOST_RATE = float(os.getenv("HTTP_HOST_RATE", "2"))
+HTTP_HOST_BURST = int(os.getenv("HTTP_HOST_BURST", "4"))
+
+ROBOTS_CACHE_TTL = int(os.getenv("ROBOTS_CACHE_TTL", "3600"))
+
+class RobotsDisallowed(Exception):
+    pass
+
+class _CappedRetry(Retry):
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, HTTP_MAX_RETRY_AFTER)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket; acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = rate
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def _build_session():
+    session = requests.Session()
+    retry = _CappedRetry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+session = _build_session()
+
+_buckets = {}
+_robots = {}  # origin -> (RobotFileParser, fetched_at)
+_state_lock = threading.Lock()
+
+def _bucket(host):
+    with _state_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(HTTP_HOST_RATE, HTTP_HOST_BURST)
+            _buckets[host] = bucket
+        return bucket
+
+def _load_robots(origin):
+    parser = RobotFileParser(f"{origin}/robots.txt")
+    try:
+        resp = session.get(f"{origin}/robots.txt", timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"robots.txt unavailable for {origin}, allowing: {e}")
+        parser.allow_all = True
+        return parser
+
+    # Same interpretation as RobotFileParser.read()
+    if resp.status_code in (401, 403):
+        parser.disallow_all = True
+    elif resp.status_code >= 400:
+        parser.allow_all = True
+    else:
+        parser.parse(resp.text.splitlines())
+    return parser
+
+def _robots_for(origin):
+    now = time.monotonic()
+    with _state_lock:
+        cached = _robots.get(origin)
+    if cached and now - cached[1] < ROBOTS_CACHE_TTL:
+        return cached[0]
+
+    parser = _load_robots(origin)
+    with _state_lock:
+        _robots[origin] = (parser, now)
+
+    # Respect Crawl-delay by slowing this host's bucket down
+    delay = parser.crawl_delay(USER_AGENT)
+    if delay:
+        _bucket(urlparse(origin).hostname).set_rate(min(HTTP_HOST_RATE, 1.0 / float(delay)))
+    return parser
+
+def is_allowed(url):
+    parsed = urlparse(url)
+    return _robots_for(f"{parsed.scheme}://{parsed.netloc}").can_fetch(USER_AGENT, url)
+
+def get(url, check_robots=True, **kwargs):
+    """
+    Polite GET through the shared session.
+    Raises RobotsDisallowed if robots.txt forbids the URL.
+    """
+    if check_robots and not is_allowed(url):
+        raise RobotsDisallowed(f"Disallowed by robots.txt: {url}")
+
+    _bucket(urlparse(url).hostname).acquire()
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    return session.get(url, **kwargs)
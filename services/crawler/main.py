@@ -1,4 +1,7 @@
-from services.crawler.rss_fetcher import fetch_and_process_feed
+from services.crawler.async_crawler import crawl_sources
+from services.crawler.rss_fetcher import init_resources
+from services.crawler.scheduler import due_sources, record_polls
+import asyncio
 import time
 
 SOURCES = [
@@ -28,16 +31,28 @@ SOURCES = [
     ("Reuters", "https://www.reutersagency.com/feed/"),
 ]
 
-def run_crawl():
+def run_crawl(sources=SOURCES, due_only=True):
     print("Starting BCIIP Crawler Phase 1...")
+    init_resources()
+    started = time.time()
     
-    for name, url in SOURCES:
-        try:
-            fetch_and_process_feed(name, url)
-        except Exception as e:
-            print(f"Failed to crawl {name}: {e}")
-            
-    print("Crawl cycle complete.")
+    # Only poll sources the adaptive scheduler considers due
+    if due_only:
+        sources = due_sources(sources)
+        print(f"{len(sources)} sources due for polling.")
+        if not sources:
+            return {}
+    
+    # Feeds and article pages are fetched concurrently (see async_crawler caps)
+    counts, skipped = asyncio.run(crawl_sources(sources))
+    record_polls(counts)
+    
+    total = sum(c for c in counts.values() if c)
+    failed = sum(1 for c in counts.values() if c is None)
+    print(f"Skipped {len(skipped)} unchanged feeds (304 / identical body): {', '.join(skipped) or '-'}")
+    print(f"Crawl cycle complete: {total} new articles from {len(sources)} sources "
+          f"({failed} failed) in {time.time() - started:.1f}s.")
+    return counts
 
 if __name__ == "__main__":
-    run_crawl()
+    run_crawl(due_only=False)
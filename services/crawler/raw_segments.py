@@ -0,0 +1,231 @@
+import gzip
+import os
+import tempfile
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from minio.error import S3Error
+from sqlalchemy import func
+from services.api.models import Article
+from services.crawler.raw_store import minio_client, MINIO_BUCKET, RAW_KINDS, read_raw, raw_kind
+
+# Archival mode: raw objects are packed into large per-source, per-day segment
+# files in WARC format. Every record is its own gzip member (as in .warc.gz), so
+# a single record can be fetched with a ranged GET at (raw_offset, raw_length)
+# and a whole segment can be read sequentially for bulk reprocessing.
+SEGMENT_PREFIX = "segments"
+SEGMENT_MAX_BYTES = int(os.getenv("SEGMENT_MAX_BYTES", str(256 * 1024 * 1024)))
+SEGMENT_READ_CHUNK = 1024 * 1024
+
+def build_record(article, body, content_type):
+    """
+    Serialize one article body as a WARC/1.0 resource record.
+    """
+    created_at = (article.created_at or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    headers = [
+        "WARC/1.0",
+        "WARC-Type: resource",
+        f"WARC-Record-ID: <urn:uuid:{article.id}>",
+        f"WARC-Target-URI: {article.url}",
+        f"WARC-Date: {created_at.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(body)}",
+    ]
+    return ("\r\n".join(headers) + "\r\n\r\n").encode("utf-8") + body + b"\r\n\r\n"
+
+def parse_record(data):
+    """
+    Split a decompressed WARC record into (headers, body).
+    """
+    head, _, rest = data.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.decode("utf-8").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    length = int(headers.get("Content-Length", len(rest)))
+    return headers, rest[:length]
+
+def read_record(segment, offset, length):
+    """
+    Fetch a single record with a ranged GET. Returns (headers, body).
+    """
+    response = minio_client.get_object(MINIO_BUCKET, segment, offset=offset, length=length)
+    try:
+        data = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+    return parse_record(gzip.decompress(data))
+
+def iter_segment(segment):
+    """
+    Stream a whole segment sequentially, yielding (headers, body) per record.
+    """
+    response = minio_client.get_object(MINIO_BUCKET, segment)
+    try:
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        record = bytearray()
+        for chunk in response.stream(SEGMENT_READ_CHUNK):
+            data = chunk
+            while data:
+                record += decompressor.decompress(data)
+                if not decompressor.eof:
+                    break
+                yield parse_record(bytes(record))
+                # The next gzip member starts in the leftover bytes
+                data = decompressor.unused_data
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                record = bytearray()
+    finally:
+        response.close()
+        response.release_conn()
+
+def _is_missing(error):
+    return isinstance(error, S3Error) and error.code in ("NoSuchKey", "NoSuchObject")
+
+def relink_to_packed_copy(session, article):
+    """
+    Point an unpacked article at the segment record of a packed article with
+    the same raw object. Objects are content-addressed, so a crawl can reuse an
+    object just before packing deletes it; the record holds the same bytes.
+    Returns True if the article was relinked. The caller commits.
+    """
+    packed = session.query(Article).filter(
+        Article.raw_storage_path == article.raw_storage_path,
+        Article.raw_segment.isnot(None)
+    ).first()
+    if packed is None:
+        return False
+    article.raw_segment = packed.raw_segment
+    article.raw_offset = packed.raw_offset
+    article.raw_length = packed.raw_length
+    return True
+
+def read_article_raw(article, session=None):
+    """
+    Raw bytes for an article, from its segment record if packed, else its object.
+    Given a session, an article whose object was deleted by packing is
+    relinked to the packed copy (relink_to_packed_copy) and read from there.
+    """
+    if not article.raw_segment:
+        try:
+            return read_raw(article.raw_storage_path)
+        except Exception as e:
+            if session is None or not _is_missing(e) or not relink_to_packed_copy(session, article):
+                raise
+    _, body = read_record(article.raw_segment, article.raw_offset, article.raw_length)
+    return body
+
+def _upload_segment(session, segment, spool, pointers):
+    size = spool.tell()
+    spool.seek(0)
+    minio_client.put_object(MINIO_BUCKET, segment, spool, size, content_type="application/warc")
+    session.bulk_update_mappings(Article, pointers)
+    session.commit()
+    print(f"Packed {len(pointers)} records into {segment} ({size} bytes)")
+
+def _delete_packed_originals(session, object_names):
+    """
+    Remove per-article objects once no unpacked article still points at them
+    (content-addressed objects can be shared between articles).
+    A crawl can start using an object between the check and the removal;
+    such articles are relinked to the packed copy here, or on their next read
+    (read_article_raw, pack_segments) if they commit later.
+    """
+    deleted = 0
+    for object_name in object_names:
+        still_used = session.query(Article).filter(
+            Article.raw_storage_path == object_name,
+            Article.raw_segment.is_(None)
+        ).count()
+        if still_used:
+            continue
+        minio_client.remove_object(MINIO_BUCKET, object_name)
+        deleted += 1
+
+        late = session.query(Article).filter(
+            Article.raw_storage_path == object_name,
+            Article.raw_segment.is_(None)
+        ).all()
+        for article in late:
+            relink_to_packed_copy(session, article)
+        session.commit()
+    return deleted
+
+def pack_segments(session, source_name, day, delete_originals=False):
+    """
+    Pack all unpacked raw objects of `source_name` created on `day` (a date)
+    into one or more segments, then point the articles at their records.
+    Returns the number of packed articles.
+    """
+    start = datetime(day.year, day.month, day.day)
+    articles = session.query(Article).filter(
+        Article.source == source_name,
+        Article.raw_storage_path.isnot(None),
+        Article.raw_segment.is_(None),
+        Article.created_at >= start,
+        Article.created_at < start + timedelta(days=1)
+    ).order_by(Article.created_at).all()
+    if not articles:
+        return 0
+
+    packed = 0
+    packed_objects = set()
+    segment, spool, pointers = None, None, []
+    try:
+        for article in articles:
+            try:
+                body = read_raw(article.raw_storage_path)
+            except Exception as e:
+                if _is_missing(e) and relink_to_packed_copy(session, article):
+                    # Its object was packed and deleted under another article
+                    session.commit()
+                    print(f"Relinked {article.id} to the packed copy of {article.raw_storage_path}")
+                    continue
+                print(f"Skipping {article.id}, raw object unreadable: {e}")
+                continue
+
+            member = gzip.compress(build_record(article, body, RAW_KINDS[raw_kind(article.raw_storage_path)]), mtime=0)
+
+            if spool is not None and spool.tell() + len(member) > SEGMENT_MAX_BYTES:
+                _upload_segment(session, segment, spool, pointers)
+                packed += len(pointers)
+                spool.close()
+                spool, pointers = None, []
+
+            if spool is None:
+                segment = f"{SEGMENT_PREFIX}/{source_name}/{day.isoformat()}/{uuid.uuid4().hex}.warc.gz"
+                spool = tempfile.TemporaryFile()
+
+            pointers.append({
+                "id": article.id,
+                "raw_segment": segment,
+                "raw_offset": spool.tell(),
+                "raw_length": len(member),
+            })
+            spool.write(member)
+            packed_objects.add(article.raw_storage_path)
+
+        if pointers:
+            _upload_segment(session, segment, spool, pointers)
+            packed += len(pointers)
+    finally:
+        if spool is not None:
+            spool.close()
+
+    if delete_originals:
+        deleted = _delete_packed_originals(session, packed_objects)
+        print(f"Deleted {deleted} per-article objects now held in segments")
+    return packed
+
+def unpacked_days(session, before):
+    """
+    (source, day) pairs that still have unpacked raw objects created before `before`.
+    """
+    day = func.date(Article.created_at)
+    rows = session.query(Article.source, day).filter(
+        Article.raw_storage_path.isnot(None),
+        Article.raw_segment.is_(None),
+        Article.created_at < before
+    ).group_by(Article.source, day).order_by(day).all()
+    return [(row[0], row[1]) for row in rows]
@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import os
+import tempfile
+from minio import Minio
+from minio.error import S3Error
+from libs.utils.config import get_minio_config
+from services.crawler import http_client
+from services.crawler.canonical import find_rel_canonical
+
+# Raw article storage in MinIO, shared by the fetchers (write) and the processor (read).
+# Objects are content-addressed: raw/<sha[:2]>/<sha256 of body>.<kind>.gz, gzip-compressed,
+# so identical bodies (syndicated stories, re-crawled URLs) are stored once.
+# Older uncompressed {source}/{uuid}.html keys remain readable.
+MINIO_CONFIG = get_minio_config()
+MINIO_BUCKET = "articles-raw"
+
+minio_client = Minio(
+    MINIO_CONFIG["endpoint"],
+    access_key=MINIO_CONFIG["access_key"],
+    secret_key=MINIO_CONFIG["secret_key"],
+    secure=MINIO_CONFIG["secure"]
+)
+
+# Bodies larger than this are rejected before anything is uploaded
+CRAWL_MAX_BODY_BYTES = int(os.getenv("CRAWL_MAX_BODY_BYTES", str(10 * 1024 * 1024)))
+STREAM_CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 1024
+# <link rel="canonical"> is looked for in this much of an HTML page
+CANONICAL_SCAN_BYTES = 64 * 1024
+# Compressed bodies are spooled in memory up to this size, then to a temp file
+SPOOL_MAX_MEMORY = 1024 * 1024
+GZIP_LEVEL = 6
+
+RAW_KINDS = {
+    "html": "text/html",
+    "pdf": "application/pdf",
+}
+
+class BodyTooLarge(Exception):
+    pass
+
+class CappedStream:
+    """
+    File-like reader over a chunk iterator that raises BodyTooLarge once more
+    than `max_bytes` have been read.
+    """
+
+    def __init__(self, chunks, max_bytes):
+        self.chunks = chunks
+        self.max_bytes = max_bytes
+        self.buffer = bytearray()
+        self.total = 0
+
+    def _fill(self, size):
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.total += len(chunk)
+            if self.total > self.max_bytes:
+                raise BodyTooLarge(f"Body exceeds {self.max_bytes} bytes")
+            self.buffer += chunk
+
+    def peek(self, size):
+        """
+        Up to `size` bytes from the front of the stream, without consuming them.
+        """
+        self._fill(size)
+        return bytes(self.buffer[:size])
+
+    def read(self, size=-1):
+        self._fill(size)
+        if size < 0:
+            size = len(self.buffer)
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+def sniff_kind(content_type, head):
+    """
+    Decide whether a body is a PDF or HTML from its magic bytes, then its header.
+    """
+    if head.lstrip()[:5] == b"%PDF-":
+        return "pdf"
+    if content_type and "pdf" in content_type.lower():
+        return "pdf"
+    return "html"
+
+def raw_object_name(content_hash, kind):
+    return f"raw/{content_hash[:2]}/{content_hash}.{kind}.gz"
+
+def object_exists(object_name):
+    try:
+        minio_client.stat_object(MINIO_BUCKET, object_name)
+        return True
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchObject"):
+            return False
+        raise
+
+def store_response(resp):
+    """
+    Stream a `stream=True` response into MinIO as a gzip, content-addressed object.
+    The body is hashed and compressed on the fly into a spooled temp file, so
+    memory stays bounded; the upload is skipped if the object already exists.
+    Returns (object_name, rel_canonical_href or None).
+    """
+    length = resp.headers.get("Content-Length")
+    if length and length.isdigit() and int(length) > CRAWL_MAX_BODY_BYTES:
+        raise BodyTooLarge(f"Content-Length {length} exceeds {CRAWL_MAX_BODY_BYTES} bytes")
+
+    chunks = resp.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+    stream = CappedStream(chunks, CRAWL_MAX_BODY_BYTES)
+    # Sniff without consuming, so the upload below reads the whole body
+    head = stream.peek(SNIFF_BYTES)
+    kind = sniff_kind(resp.headers.get("Content-Type"), head)
+
+    digest = hashlib.sha256()
+    page_head = bytearray()
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+        # mtime=0 keeps the compressed bytes deterministic for a given body
+        with gzip.GzipFile(fileobj=spool, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as gz:
+            data = stream.read(STREAM_CHUNK_SIZE)
+            while data:
+                digest.update(data)
+                gz.write(data)
+                if len(page_head) < CANONICAL_SCAN_BYTES:
+                    page_head += data[:CANONICAL_SCAN_BYTES - len(page_head)]
+                data = stream.read(STREAM_CHUNK_SIZE)
+
+        rel_canonical = find_rel_canonical(bytes(page_head)) if kind == "html" else None
+        object_name = raw_object_name(digest.hexdigest(), kind)
+        if object_exists(object_name):
+            return object_name, rel_canonical
+
+        size = spool.tell()
+        spool.seek(0)
+        minio_client.put_object(
+            MINIO_BUCKET,
+            object_name,
+            spool,
+            size,
+            content_type="application/gzip",
+            metadata={"raw-content-type": RAW_KINDS[kind]}
+        )
+    return object_name, rel_canonical
+
+def raw_kind(object_name):
+    """
+    'pdf' or 'html' for a stored object name, compressed or legacy.
+    """
+    name = object_name[:-3] if object_name.endswith(".gz") else object_name
+    return "pdf" if name.endswith(".pdf") else "html"
+
+def read_raw(object_name):
+    """
+    Fetch a raw object and return its (decompressed) bytes.
+    """
+    response = minio_client.get_object(MINIO_BUCKET, object_name)
+    try:
+        data = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+    if object_name.endswith(".gz"):
+        data = gzip.decompress(data)
+    return data
+
+def download_and_store(url):
+    """
+    Download an article page and stream the raw body to MinIO.
+    Returns (object_name, rel_canonical_href or None).
+    """
+    with http_client.get(url, stream=True) as resp:
+        resp.raise_for_status()
+        return store_response(resp)
@@ -1,33 +1,17 @@
-import feedparser
-import requests
-import uuid
-import os
-import io
+import time
 from datetime import datetime
-from minio import Minio
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from libs.utils.config import get_database_url, get_redis_url, get_minio_config
-from services.api.models import Article, Base
+from libs.utils.config import get_database_url
+from services.api.models import Base
+from services.crawler.feed_cache import fetch_feed, save_validators
+from services.crawler.url_filter import find_new_urls
+from services.crawler import article_store
+from services.crawler.raw_store import minio_client, MINIO_BUCKET, download_and_store
+from services.crawler.canonical import canonicalize_url, apply_rel_canonical
 
 # Configuration
 DATABASE_URL = get_database_url()
-MINIO_CONFIG = get_minio_config()
-MINIO_ENDPOINT = MINIO_CONFIG["endpoint"]
-MINIO_ACCESS_KEY = MINIO_CONFIG["access_key"]
-MINIO_SECRET_KEY = MINIO_CONFIG["secret_key"]
-MINIO_BUCKET = "articles-raw"
-MINIO_SECURE = MINIO_CONFIG["secure"]
-
-# MinIO Setup
-minio_client = Minio(
-    MINIO_ENDPOINT,
-    access_key=MINIO_ACCESS_KEY,
-    secret_key=MINIO_SECRET_KEY,
-    secure=MINIO_SECURE
-)
-
-# DB Setup
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -44,64 +28,83 @@ def init_resources():
         print(f"Resource initialization failed (MinIO/DB): {e}")
         raise
 
+def parse_feed(rss_url):
+    """
+    Download and parse a feed with a conditional GET.
+    Returns (feed, validators); feed is None when the feed is unchanged.
+    """
+    return fetch_feed(rss_url)
+
+def entry_to_candidate(entry, source_name=None):
+    """
+    Extract the article metadata we store from a feed entry.
+    """
+    published_parsed = entry.get("published_parsed")
+    published_at = datetime.fromtimestamp(time.mktime(published_parsed)) if published_parsed else datetime.utcnow()
+    return {
+        "url": entry.link,
+        "canonical_url": canonicalize_url(entry.link, source_name),
+        "title": entry.title,
+        "published_at": published_at,
+    }
+
+def filter_new_candidates(candidates):
+    """
+    Drop candidates whose canonical URL is already stored (one batched lookup, see url_filter).
+    """
+    session = SessionLocal()
+    try:
+        new_urls = set(find_new_urls(session, [c["canonical_url"] for c in candidates]))
+    finally:
+        session.close()
+
+    new_candidates = []
+    for candidate in candidates:
+        if candidate["canonical_url"] in new_urls:
+            new_candidates.append(candidate)
+            new_urls.discard(candidate["canonical_url"])
+    return new_candidates
+
+def save_articles(source_name, records):
+    """
+    Persist downloaded articles with one bulk insert (duplicate URLs are ignored).
+    Each record is a candidate dict plus raw_storage_path.
+    Returns the number of newly saved articles.
+    """
+    return article_store.save_articles(SessionLocal, source_name, records)
+
 def fetch_and_process_feed(source_name, rss_url):
+    """
+    Sequential single-feed crawl. The scheduled crawl uses services.crawler.async_crawler.
+    """
     init_resources()
     print(f"Fetching {source_name} from {rss_url}...")
-    feed = feedparser.parse(rss_url)
-    
-    session = SessionLocal()
-    count = 0
-    
+    feed, validators = parse_feed(rss_url)
+    if feed is None:
+        save_validators(rss_url, validators)
+        print(f"{source_name} unchanged since last crawl, skipped.")
+        return 0
+
+    candidates = []
     for entry in feed.entries:
         try:
-            url = entry.link
-            
-            # Check for existing
-            existing = session.query(Article).filter(Article.url == url).first()
-            if existing:
-                continue
-                
-            title = entry.title
-            published_parsed = entry.get("published_parsed")
-            published_at = datetime.fromtimestamp(time.mktime(published_parsed)) if published_parsed else datetime.utcnow()
-            
-            # Download Raw Content
-            # For some RSS, the content is in the feed, but specs say "Store raw HTML/text".
-            # Usually implies visiting the page.
-            try:
-                resp = requests.get(url, timeout=10)
-                raw_html = resp.content
-            except Exception as e:
-                print(f"Failed to fetch content for {url}: {e}")
-                continue
-
-            # Upload to MinIO
-            object_name = f"{source_name}/{uuid.uuid4()}.html"
-            minio_client.put_object(
-                MINIO_BUCKET,
-                object_name,
-                io.BytesIO(raw_html),
-                len(raw_html),
-                content_type="text/html"
-            )
-
-            # Save to DB
-            article = Article(
-                url=url,
-                source=source_name,
-                title=title,
-                published_at=published_at,
-                raw_storage_path=object_name
-            )
-            session.add(article)
-            count += 1
-            
+            candidates.append(entry_to_candidate(entry, source_name))
         except Exception as e:
             print(f"Error processing entry {entry.get('link', 'unknown')}: {e}")
-            continue
-    
-    session.commit()
-    session.close()
-    print(f"Imported {count} new articles from {source_name}")
 
-import time
+    new_candidates = filter_new_candidates(candidates)
+    records = []
+    for candidate in new_candidates:
+        try:
+            candidate["raw_storage_path"], rel_canonical = download_and_store(candidate["url"])
+            records.append(apply_rel_canonical(candidate, rel_canonical, source_name))
+        except Exception as e:
+            print(f"Failed to fetch content for {candidate['url']}: {e}")
+
+    count = save_articles(source_name, records)
+    # Only remember this version once every new entry made it in,
+    # otherwise failed downloads would be skipped until the feed changes.
+    if len(records) == len(new_candidates):
+        save_validators(rss_url, validators)
+    print(f"Imported {count} new articles from {source_name}")
+    return count
@@ -0,0 +1,81 @@
+import os
+import time
+from libs.utils.redis_client import get_redis
+
+# Adaptive per-source polling. After each poll we update an EWMA of new
+# articles per minute and poll again when about CRAWL_TARGET_NEW_PER_POLL new
+# articles are expected, clamped to [CRAWL_MIN_INTERVAL, CRAWL_MAX_INTERVAL].
+# State per source lives in the Redis hash bciip:schedule:<source>:
+#   interval (s), next_due (epoch), rate (new/min), last_poll (epoch), last_new
+SCHEDULE_KEY_PREFIX = "bciip:schedule:"
+CRAWL_MIN_INTERVAL = int(os.getenv("CRAWL_MIN_INTERVAL", "120"))
+CRAWL_MAX_INTERVAL = int(os.getenv("CRAWL_MAX_INTERVAL", "3600"))
+CRAWL_DEFAULT_INTERVAL = int(os.getenv("CRAWL_DEFAULT_INTERVAL", "600"))
+CRAWL_TARGET_NEW_PER_POLL = float(os.getenv("CRAWL_TARGET_NEW_PER_POLL", "5"))
+CRAWL_RATE_ALPHA = float(os.getenv("CRAWL_RATE_ALPHA", "0.3"))
+
+def _key(source_name):
+    return SCHEDULE_KEY_PREFIX + source_name
+
+def get_schedule(source_name):
+    raw = get_redis().hgetall(_key(source_name))
+    return {k.decode("utf-8"): float(v) for k, v in raw.items()}
+
+def next_interval(rate_per_minute):
+    """
+    Seconds until the next poll for a source publishing `rate_per_minute`.
+    """
+    if rate_per_minute <= 0:
+        return CRAWL_MAX_INTERVAL
+    interval = CRAWL_TARGET_NEW_PER_POLL / rate_per_minute * 60
+    return int(min(CRAWL_MAX_INTERVAL, max(CRAWL_MIN_INTERVAL, interval)))
+
+def due_sources(sources, now=None):
+    """
+    Sources whose next poll is due. Sources never polled are always due.
+    If Redis is unreachable every source is treated as due.
+    """
+    now = now or time.time()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for name, _ in sources:
+            pipe.hget(_key(name), "next_due")
+        next_dues = pipe.execute()
+    except Exception as e:
+        print(f"Crawl schedule unavailable, polling all sources: {e}")
+        return list(sources)
+
+    return [source for source, next_due in zip(sources, next_dues)
+            if next_due is None or float(next_due) <= now]
+
+def record_poll(source_name, new_count, now=None):
+    """
+    Update a source's publish-rate estimate after a poll and schedule the next one.
+    new_count is None for a failed poll, which keeps the current interval.
+    """
+    now = now or time.time()
+    state = get_schedule(source_name)
+    interval = state.get("interval", CRAWL_DEFAULT_INTERVAL)
+
+    if new_count is not None:
+        elapsed = now - state["last_poll"] if "last_poll" in state else interval
+        observed = new_count / max(elapsed / 60.0, 1e-6)
+        rate = observed if "rate" not in state else CRAWL_RATE_ALPHA * observed + (1 - CRAWL_RATE_ALPHA) * state["rate"]
+        interval = next_interval(rate)
+        update = {"rate": rate, "last_poll": now, "last_new": new_count}
+    else:
+        update = {}
+
+    update.update({"interval": interval, "next_due": now + interval})
+    get_redis().hset(_key(source_name), mapping=update)
+    return interval
+
+def record_polls(counts, now=None):
+    """
+    record_poll() for a {source_name: new_count} crawl result. Errors are logged.
+    """
+    for source_name, new_count in counts.items():
+        try:
+            record_poll(source_name, new_count, now)
+        except Exception as e:
+            print(f"Could not update crawl schedule for {source_name}: {e}")
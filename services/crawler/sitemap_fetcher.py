@@ -1,31 +1,20 @@
 from usp.tree import sitemap_tree_for_homepage
-import requests
 from datetime import datetime
-import uuid
-import io
+from itertools import islice
+import asyncio
 import os
-from minio import Minio
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from libs.utils.config import get_database_url, get_minio_config
-from services.api.models import Article, Base
+from libs.utils.config import get_database_url
+from services.api.models import Base
+from services.crawler.url_filter import find_new_urls
+from services.crawler.article_store import save_articles
+from services.crawler.raw_store import minio_client, MINIO_BUCKET
+from services.crawler.async_crawler import CrawlLimiter, download_candidates
+from services.crawler.canonical import canonicalize_url
 
 # Configuration (Reuse existing)
 DATABASE_URL = get_database_url()
-MINIO_CONFIG = get_minio_config()
-MINIO_ENDPOINT = MINIO_CONFIG["endpoint"]
-MINIO_ACCESS_KEY = MINIO_CONFIG["access_key"]
-MINIO_SECRET_KEY = MINIO_CONFIG["secret_key"]
-MINIO_BUCKET = "articles-raw"
-MINIO_SECURE = MINIO_CONFIG["secure"]
-
-minio_client = Minio(
-    MINIO_ENDPOINT,
-    access_key=MINIO_ACCESS_KEY,
-    secret_key=MINIO_SECRET_KEY,
-    secure=MINIO_SECURE
-)
-
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -41,67 +30,102 @@ def init_resources():
         print(f"Resource initialization failed: {e}")
         raise
 
-def fetch_sitemap(url, source_name):
+# Sitemap pages are de-duplicated and downloaded in chunks of this size
+SITEMAP_CHUNK_SIZE = int(os.getenv("SITEMAP_CHUNK_SIZE", "200"))
+
+def page_to_candidate(page):
+    """
+    Sitemap page -> candidate dict. Kept JSON-serializable (ISO date string)
+    so chunks can be sent to Celery tasks.
+    """
+    news_story = getattr(page, "news_story", None)
+    published_at = getattr(news_story, "publish_date", None) or getattr(page, "last_modified", None)
+    title = getattr(news_story, "title", None) or page.url # Temporary title until processing
+    return {
+        "url": page.url,
+        "title": title,
+        "published_at": published_at.isoformat() if published_at else None,
+    }
+
+def iter_page_chunks(pages, size=SITEMAP_CHUNK_SIZE):
+    """
+    Stream sitemap pages as lists of candidates.
+    """
+    chunk = []
+    for page in pages:
+        try:
+            chunk.append(page_to_candidate(page))
+        except Exception as e:
+            print(f"Error reading sitemap page {getattr(page, 'url', 'unknown')}: {e}")
+            continue
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def _download(source_name, candidates):
+    limiter = CrawlLimiter()
+    try:
+        return await download_candidates(source_name, candidates, limiter)
+    finally:
+        limiter.shutdown()
+
+def backfill_candidates(source_name, candidates):
+    """
+    Import one chunk: one batched dedupe lookup, concurrent downloads,
+    one bulk insert. Returns (imported, failed_downloads).
+    """
+    for candidate in candidates:
+        candidate["canonical_url"] = canonicalize_url(candidate["url"], source_name)
+
+    session = SessionLocal()
+    try:
+        # One batched lookup per chunk instead of a query per page
+        new_urls = set(find_new_urls(session, [c["canonical_url"] for c in candidates]))
+    finally:
+        session.close()
+
+    new_candidates = []
+    for candidate in candidates:
+        if candidate["canonical_url"] not in new_urls:
+            continue
+        new_urls.discard(candidate["canonical_url"])
+        published_at = candidate.get("published_at")
+        new_candidates.append({
+            "url": candidate["url"],
+            "canonical_url": candidate["canonical_url"],
+            "title": candidate["title"],
+            # Sitemap date if available, else now
+            "published_at": datetime.fromisoformat(published_at) if published_at else datetime.now(),
+        })
+
+    records = asyncio.run(_download(source_name, new_candidates))
+    count = save_articles(SessionLocal, source_name, records)
+    return count, len(new_candidates) - len(records)
+
+def fetch_sitemap(url, source_name, max_pages=None):
+    """
+    Backfill a sitemap in this process, chunk by chunk.
+    Large backfills should go through services.crawler.backfill (Celery fan-out).
+    """
     init_resources()
     print(f"Fetching sitemap for {url}...")
     tree = sitemap_tree_for_homepage(url)
     
-    session = SessionLocal()
-    count = 0
-    limit = 50 # Validating concept only
+    pages = tree.all_pages()
+    if max_pages:
+        pages = islice(pages, max_pages)
     
-    for page in tree.all_pages():
-        if count >= limit:
-            break
-            
-        try:
-            article_url = page.url
-            # Filter checks
-            existing = session.query(Article).filter(Article.url == article_url).first()
-            if existing:
-                continue
-                
-            print(f"Backfilling: {article_url}")
-            
-            # Fetch content
-            try:
-                resp = requests.get(article_url, timeout=10)
-                raw_html = resp.content
-            except Exception as e:
-                print(f"Failed to fetch {article_url}: {e}")
-                continue
-
-            # Upload to MinIO
-            object_name = f"{source_name}/backfill/{uuid.uuid4()}.html"
-            minio_client.put_object(
-                MINIO_BUCKET,
-                object_name,
-                io.BytesIO(raw_html),
-                len(raw_html),
-                content_type="text/html"
-            )
-
-            # Save to DB
-            # Try to infer date from URL or headers if available, else now
-            published_at = datetime.now() # naive fallback
-            
-            article = Article(
-                url=article_url,
-                source=source_name,
-                title=article_url, # Temporary title until processing
-                published_at=published_at,
-                raw_storage_path=object_name
-            )
-            session.add(article)
-            count += 1
-            
-        except Exception as e:
-            print(f"Error processing {page.url}: {e}")
+    count = 0
+    for chunk in iter_page_chunks(pages):
+        imported, failed = backfill_candidates(source_name, chunk)
+        count += imported
+        print(f"Backfilled {imported}/{len(chunk)} pages ({failed} failed) for {source_name}")
             
-    session.commit()
-    session.close()
     print(f"Backfilled {count} articles for {source_name}")
+    return count
 
 if __name__ == "__main__":
     # Test
-    fetch_sitemap('https://www.thedailystar.net/', 'Daily Star')
+    fetch_sitemap('https://www.thedailystar.net/', 'Daily Star', max_pages=50)
@@ -0,0 +1,105 @@
+import hashlib
+import math
+import os
+from sqlalchemy import or_
+from services.api.models import Article
+from libs.utils.redis_client import get_redis
+
+# Bloom filter of stored canonical article URLs, kept as a Redis bitmap.
+# A hit is treated as "already seen" without asking Postgres; at the default
+# error rate roughly 1 in 1000 genuinely new URLs is wrongly skipped.
+# Misses are always confirmed against Postgres, so an empty or lost filter
+# only costs extra queries (see scripts/seed_url_filter.py to warm it up).
+URL_BLOOM_KEY = "bciip:urls:bloom"
+URL_BLOOM_CAPACITY = int(os.getenv("URL_BLOOM_CAPACITY", "5000000"))
+URL_BLOOM_ERROR_RATE = float(os.getenv("URL_BLOOM_ERROR_RATE", "0.001"))
+
+# Max URLs per `url IN (...)` lookup
+DEDUPE_CHUNK_SIZE = 1000
+
+class UrlBloomFilter:
+    """
+    Bloom filter over a Redis bitmap, using double hashing of a SHA-256 digest.
+    """
+
+    def __init__(self, key=URL_BLOOM_KEY, capacity=URL_BLOOM_CAPACITY, error_rate=URL_BLOOM_ERROR_RATE):
+        self.key = key
+        self.num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+
+    def _offsets(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def contains_many(self, urls):
+        """
+        Return a list of booleans, True where the URL is (probably) present.
+        """
+        if not urls:
+            return []
+        pipe = get_redis().pipeline(transaction=False)
+        for url in urls:
+            for offset in self._offsets(url):
+                pipe.getbit(self.key, offset)
+        bits = pipe.execute()
+
+        k = self.num_hashes
+        return [all(bits[i * k:(i + 1) * k]) for i in range(len(urls))]
+
+    def add_many(self, urls):
+        if not urls:
+            return
+        pipe = get_redis().pipeline(transaction=False)
+        for url in urls:
+            for offset in self._offsets(url):
+                pipe.setbit(self.key, offset, 1)
+        pipe.execute()
+
+url_filter = UrlBloomFilter()
+
+def mark_seen(urls):
+    """
+    Record stored URLs in the Bloom filter. Failures are logged, not raised:
+    the filter is only an accelerator in front of Postgres.
+    """
+    try:
+        url_filter.add_many(list(urls))
+    except Exception as e:
+        print(f"URL filter update failed: {e}")
+
+def find_new_urls(session, urls):
+    """
+    Return the subset of canonical `urls` not yet stored, preserving order and
+    dropping repeats. Bloom filter hits are skipped outright; the rest are
+    resolved against articles.canonical_url/url with one query per chunk.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return []
+
+    try:
+        maybe_seen = url_filter.contains_many(unique_urls)
+        unknown = [url for url, seen in zip(unique_urls, maybe_seen) if not seen]
+    except Exception as e:
+        print(f"URL filter unavailable, checking all URLs in Postgres: {e}")
+        unknown = unique_urls
+
+    stored = set()
+    for start in range(0, len(unknown), DEDUPE_CHUNK_SIZE):
+        chunk = unknown[start:start + DEDUPE_CHUNK_SIZE]
+        rows = session.query(Article.url, Article.canonical_url).filter(
+            or_(Article.canonical_url.in_(chunk), Article.url.in_(chunk))
+        ).all()
+        for url, canonical_url in rows:
+            stored.add(url)
+            stored.add(canonical_url)
+        stored.discard(None)
+
+    # Self-heal: URLs Postgres knows about but the filter did not
+    known = [url for url in unknown if url in stored]
+    if known:
+        mark_seen(known)
+
+    return [url for url in unknown if url not in stored]
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+from libs.embeddings.embedder import encode_texts, get_model, MODEL_NAME, EMBEDDING_BACKEND
+
+# Shared embedding server: one model copy per node instead of one per API
+# worker / Celery child. Concurrent requests are gathered into micro-batches:
+# the first waiting request opens a batch, which closes after
+# EMBED_SERVER_MAX_WAIT_MS or once EMBED_SERVER_MAX_BATCH texts are queued.
+# Clients set EMBEDDING_SERVER_URL (see libs/embeddings/embedder.py).
+# Run with a single worker, e.g.:
+#   uvicorn services.embedding_server.main:app --host 127.0.0.1 --port 8100
+EMBED_SERVER_MAX_BATCH = int(os.getenv("EMBED_SERVER_MAX_BATCH", "64"))
+EMBED_SERVER_MAX_WAIT_MS = float(os.getenv("EMBED_SERVER_MAX_WAIT_MS", "5"))
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+class MicroBatcher:
+    def __init__(self, encode, max_batch=EMBED_SERVER_MAX_BATCH, max_wait_ms=EMBED_SERVER_MAX_WAIT_MS):
+        self.encode = encode
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue()
+        # One inference at a time; the model already uses all cores per batch
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.stats = {"requests": 0, "texts": 0, "batches": 0}
+
+    async def submit(self, texts):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _collect(self):
+        items = [await self.queue.get()]
+        size = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            texts = [text for item_texts, _ in items for text in item_texts]
+            try:
+                embeddings = await loop.run_in_executor(self.executor, self.encode, texts)
+                if embeddings is None:
+                    raise RuntimeError("Embedding generation failed")
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(items)
+            self.stats["texts"] += len(texts)
+            self.stats["batches"] += 1
+            start = 0
+            for item_texts, future in items:
+                if not future.done():
+                    future.set_result(embeddings[start:start + len(item_texts)])
+                start += len(item_texts)
+
+app = FastAPI(title="BCIIP Embedding Server")
+batcher = MicroBatcher(encode_texts)
+
+@app.on_event("startup")
+async def startup():
+    # Load the model before taking traffic
+    if get_model() is None:
+        raise RuntimeError("Embedding model could not be loaded")
+    app.state.batcher_task = asyncio.create_task(batcher.run())
+
+@app.get("/health")
+def health():
+    return {
+        "status": "ok",
+        "model": MODEL_NAME,
+        "backend": EMBEDDING_BACKEND,
+        **batcher.stats,
+        "avg_batch_texts": round(batcher.stats["texts"] / batcher.stats["batches"], 1) if batcher.stats["batches"] else 0.0,
+    }
+
+@app.post("/embed")
+async def embed(request: EmbedRequest):
+    if not request.texts:
+        return {"embeddings": []}
+    try:
+        embeddings = await batcher.submit(request.texts)
+    except Exception as e:
+        print(f"Embedding server error: {e}")
+        raise HTTPException(status_code=500, detail="Embedding generation failed")
+    return {"embeddings": embeddings.tolist()}
@@ -0,0 +1,84 @@
+import os
+import socket
+import time
+import uuid
+from redis.exceptions import ResponseError
+from libs.utils.redis_client import get_redis
+from services.processor.events import ARTICLE_STREAM_KEY, ARTICLE_STREAM_GROUP
+from services.processor.main import init_resources, process_articles
+
+# Long-running stream consumer: processes new articles seconds after ingest.
+# Messages are acknowledged only after their articles went through all stages,
+# so a consumer that dies mid-batch leaves them pending; any consumer takes
+# them over with XAUTOCLAIM once they have been idle for CONSUMER_CLAIM_IDLE_MS.
+CONSUMER_BATCH_SIZE = int(os.getenv("CONSUMER_BATCH_SIZE", "16"))
+CONSUMER_BLOCK_MS = int(os.getenv("CONSUMER_BLOCK_MS", "5000"))
+CONSUMER_CLAIM_IDLE_MS = int(os.getenv("CONSUMER_CLAIM_IDLE_MS", "300000"))
+
+def ensure_group(r):
+    try:
+        # "0": a new group also picks up entries published before it existed
+        r.xgroup_create(ARTICLE_STREAM_KEY, ARTICLE_STREAM_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+def consumer_name():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+def handle_messages(r, messages):
+    """
+    Process a batch of stream entries and acknowledge them.
+    """
+    message_ids = [message_id for message_id, _ in messages]
+    article_ids = []
+    for _, fields in messages:
+        article_id = (fields or {}).get(b"article_id")
+        if article_id:
+            try:
+                article_ids.append(uuid.UUID(article_id.decode("utf-8")))
+            except ValueError:
+                print(f"Skipping malformed article event: {fields}")
+
+    if article_ids:
+        completed = process_articles(article_ids)
+        print(f"Processed {len(article_ids)} new articles ({completed} stage runs).")
+    if message_ids:
+        r.xack(ARTICLE_STREAM_KEY, ARTICLE_STREAM_GROUP, *message_ids)
+
+def reclaim(r, name):
+    """
+    Take over entries another consumer read but never acknowledged.
+    """
+    result = r.xautoclaim(ARTICLE_STREAM_KEY, ARTICLE_STREAM_GROUP, name,
+                          min_idle_time=CONSUMER_CLAIM_IDLE_MS, start_id="0-0",
+                          count=CONSUMER_BATCH_SIZE)
+    # [next_start_id, claimed_entries(, deleted_ids)]; deleted entries come back as None
+    return [(message_id, fields) for message_id, fields in result[1] if message_id is not None]
+
+def run_consumer():
+    init_resources()
+    r = get_redis()
+    ensure_group(r)
+    name = consumer_name()
+    print(f"Stream consumer {name} listening on {ARTICLE_STREAM_KEY}...")
+
+    while True:
+        try:
+            stale = reclaim(r, name)
+            if stale:
+                print(f"Reclaimed {len(stale)} unacknowledged article events.")
+                handle_messages(r, stale)
+                continue
+
+            response = r.xreadgroup(ARTICLE_STREAM_GROUP, name, {ARTICLE_STREAM_KEY: ">"},
+                                    count=CONSUMER_BATCH_SIZE, block=CONSUMER_BLOCK_MS)
+            for _, messages in response or []:
+                handle_messages(r, messages)
+        except Exception as e:
+            # Unacknowledged entries stay pending and are reclaimed later
+            print(f"Stream consumer error: {e}")
+            time.sleep(5)
+
+if __name__ == "__main__":
+    run_consumer()
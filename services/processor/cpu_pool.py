@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from libs.text_cleaning.cleaner import extract_from_pdf
+from libs.text_cleaning.extractor import extract_main_text
+
+# Process pool for the pure-Python, CPU-bound NLP steps (cleaning, language,
+# categorization, entity extraction, summarization). The parent keeps MinIO
+# reads, DB writes and embeddings. Workers are spawned (no forked DB or Redis
+# connections) and preload their models once. This module is what a worker
+# imports, so it stays free of database and embedding imports.
+# PROCESS_POOL_WORKERS=1 (or 0) runs everything inline.
+PROCESS_POOL_WORKERS = int(os.getenv("PROCESS_POOL_WORKERS", str(os.cpu_count() or 1)))
+
+_pool = None
+_pool_disabled = PROCESS_POOL_WORKERS <= 1
+
+def _init_worker():
+    from libs.language_detection.detector import get_model
+    get_model()
+
+def _call(func, *args):
+    # Per-item errors come back as values so one bad article does not fail the batch
+    try:
+        return True, func(*args)
+    except Exception as e:
+        return False, repr(e)
+
+def clean_content(kind, content_bytes, source_name=None):
+    if kind == 'pdf':
+        return extract_from_pdf(content_bytes) or ""
+    # Default to HTML: main content only, clean_html as fallback
+    return extract_main_text(content_bytes.decode('utf-8', errors='ignore'), source_name) or ""
+
+def get_pool():
+    """
+    The shared pool, created on first use; None when running inline.
+    Celery prefork children may not start child processes, in which case the
+    pool is disabled and work runs inline.
+    """
+    global _pool, _pool_disabled
+    if _pool is None and not _pool_disabled and multiprocessing.current_process().daemon:
+        print("Daemonic process cannot start a process pool, running inline")
+        _pool_disabled = True
+    if _pool is None and not _pool_disabled:
+        try:
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        except Exception as e:
+            print(f"Process pool unavailable, running inline: {e}")
+            _pool_disabled = True
+    return _pool
+
+def _drop_pool(pool, error):
+    # A dead worker only needs a fresh pool next time; an AssertionError means
+    # this process may not have children at all, so stay inline from now on
+    global _pool, _pool_disabled
+    pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+    if isinstance(error, AssertionError):
+        _pool_disabled = True
+
+def pool_map(func, *iterables):
+    """
+    Apply func over the zipped iterables on the pool, in order.
+    Returns a list of (ok, result_or_error) pairs.
+    """
+    args = list(zip(*iterables))
+    pool = get_pool()
+    if pool is None or len(args) < 2:
+        return [_call(func, *item) for item in args]
+
+    chunksize = max(1, len(args) // (PROCESS_POOL_WORKERS * 4))
+    try:
+        return list(pool.map(_call, [func] * len(args), *zip(*args), chunksize=chunksize))
+    except (BrokenProcessPool, AssertionError) as e:
+        print(f"Process pool failed, running batch inline: {e!r}")
+        _drop_pool(pool, e)
+        return [_call(func, *item) for item in args]
+
+def pool_submit(func, *args):
+    """
+    Start func(*args) on the pool without waiting. Returns a future whose
+    result is an (ok, result_or_error) pair; inline mode resolves it at once.
+    """
+    pool = get_pool()
+    if pool is not None:
+        try:
+            return pool.submit(_call, func, *args)
+        except (BrokenProcessPool, AssertionError, RuntimeError) as e:
+            print(f"Process pool failed, running inline: {e!r}")
+            _drop_pool(pool, e)
+
+    future = Future()
+    future.set_result(_call(func, *args))
+    return future
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
@@ -0,0 +1,75 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from sqlalchemy.dialects.postgresql import insert
+from services.api.models import Entity, ArticleEntity
+
+# Entity IDs by (text, type). Entities are never renamed or deleted, so a
+# cached ID stays valid; hot entities ("Dhaka", "Bangladesh") skip the
+# database entirely.
+ENTITY_CACHE_SIZE = int(os.getenv("ENTITY_CACHE_SIZE", "20000"))
+
+_entity_ids = OrderedDict()
+_lock = threading.Lock()
+
+def _cache_get(pair):
+    with _lock:
+        entity_id = _entity_ids.get(pair)
+        if entity_id is not None:
+            _entity_ids.move_to_end(pair)
+        return entity_id
+
+def _cache_put(pair, entity_id):
+    with _lock:
+        _entity_ids[pair] = entity_id
+        _entity_ids.move_to_end(pair)
+        while len(_entity_ids) > ENTITY_CACHE_SIZE:
+            _entity_ids.popitem(last=False)
+
+def resolve_entity_ids(session, pairs):
+    """
+    Map (type, text) pairs to entity IDs, creating missing entities.
+    Cache misses are resolved with one upsert; the no-op DO UPDATE makes
+    RETURNING include rows that already existed. The caller commits, then
+    passes the result to cache_entity_ids: IDs of a rolled-back insert must
+    never reach the cache.
+    """
+    ids = {}
+    missing = []
+    for pair in dict.fromkeys(pairs):
+        entity_id = _cache_get(pair)
+        if entity_id is not None:
+            ids[pair] = entity_id
+        else:
+            missing.append(pair)
+
+    if missing:
+        # Sorted so concurrent workers lock entity rows in the same order
+        rows = [{"id": uuid.uuid4(), "type": ent_type, "text": ent_text} for ent_type, ent_text in sorted(missing)]
+        stmt = insert(Entity).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            constraint="_text_type_uc",
+            set_={"text": stmt.excluded.text}
+        ).returning(Entity.id, Entity.type, Entity.text)
+        for row in session.execute(stmt):
+            pair = (row.type, row.text)
+            ids[pair] = row.id
+
+    return ids
+
+def cache_entity_ids(ids):
+    """
+    Remember committed (type, text) -> ID mappings from resolve_entity_ids.
+    """
+    for pair, entity_id in ids.items():
+        _cache_put(pair, entity_id)
+
+def link_entities(session, article_id, entity_ids):
+    """
+    Link an article to entities in one statement; existing links are kept.
+    """
+    if not entity_ids:
+        return
+    rows = [{"article_id": article_id, "entity_id": entity_id} for entity_id in dict.fromkeys(entity_ids)]
+    session.execute(insert(ArticleEntity).values(rows).on_conflict_do_nothing())
@@ -0,0 +1,27 @@
+import os
+from libs.utils.redis_client import get_redis
+
+# New-article events. article_store publishes the IDs it inserts to a Redis
+# Stream; services/processor/consumer.py reads it through a consumer group.
+# Each entry is {"article_id": <uuid>}. The stream is trimmed to roughly
+# ARTICLE_STREAM_MAXLEN entries; anything lost (trimmed, Redis down) is still
+# found by the periodic process_task scan.
+ARTICLE_STREAM_KEY = "bciip:articles:new"
+ARTICLE_STREAM_GROUP = "processors"
+ARTICLE_STREAM_MAXLEN = int(os.getenv("ARTICLE_STREAM_MAXLEN", "100000"))
+
+def publish_new_articles(article_ids):
+    """
+    Publish inserted article IDs. Failures are logged, not raised: the
+    articles are already committed and the safety-net scan will process them.
+    """
+    if not article_ids:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for article_id in article_ids:
+            pipe.xadd(ARTICLE_STREAM_KEY, {"article_id": str(article_id)},
+                      maxlen=ARTICLE_STREAM_MAXLEN, approximate=True)
+        pipe.execute()
+    except Exception as e:
+        print(f"Article event publish failed: {e}")
@@ -0,0 +1,56 @@
+import time
+from services.api.models import Article
+from libs.utils.redis_client import get_redis
+
+# Processor gauges, kept in one Redis hash and refreshed after every drain run:
+#   queue_depth:<stage>   articles currently pending for the stage
+#   last_processed        articles handled by the last run (all stages)
+#   last_elapsed_seconds  wall time of the last run
+#   articles_per_second   throughput of the last run
+#   total_processed       running total since the hash was created
+#   updated_at            unix time of the last update
+PROCESSOR_STATS_KEY = "bciip:processor:stats"
+
+def queue_depth(session, stages):
+    """
+    Pending articles per stage, as selected by the stage claim filter.
+    """
+    return {stage.name: session.query(Article.id).filter(stage.pending()).count() for stage in stages}
+
+def record_run(depth, processed, elapsed):
+    """
+    Publish gauges for a finished run. Failures are logged, not raised:
+    gauges must never stop processing.
+    """
+    mapping = {f"queue_depth:{name}": count for name, count in depth.items()}
+    mapping.update({
+        "last_processed": processed,
+        "last_elapsed_seconds": round(elapsed, 1),
+        "articles_per_second": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+        "updated_at": time.time(),
+    })
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hset(PROCESSOR_STATS_KEY, mapping=mapping)
+        pipe.hincrby(PROCESSOR_STATS_KEY, "total_processed", processed)
+        pipe.execute()
+    except Exception as e:
+        print(f"Processor gauge update failed: {e}")
+
+def get_processor_state():
+    raw = get_redis().hgetall(PROCESSOR_STATS_KEY)
+    state = {k.decode("utf-8"): v.decode("utf-8") for k, v in raw.items()}
+    if not state:
+        return {}
+
+    depth = {}
+    for field in list(state):
+        if field.startswith("queue_depth:"):
+            depth[field[len("queue_depth:"):]] = int(state.pop(field))
+    state["queue_depth"] = depth
+    state["backlog"] = sum(depth.values())
+    for field in ("last_processed", "total_processed"):
+        state[field] = int(state.get(field, 0))
+    for field in ("last_elapsed_seconds", "articles_per_second", "updated_at"):
+        state[field] = float(state.get(field, 0))
+    return state
@@ -1,22 +1,13 @@
 import os
 import time
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import os
-import uuid
-from sqlalchemy import create_engine
+from datetime import timedelta
+from sqlalchemy import create_engine, select, update, func
 from sqlalchemy.orm import sessionmaker
 from minio import Minio
 from services.api.models import Article
-from libs.text_cleaning.cleaner import clean_html, extract_from_pdf
-from libs.language_detection.detector import detect_language
-from libs.categorization.categorizer import categorize_text
-from libs.entity_extraction.extractor import extract_entities
-from libs.summarization.summarizer import generate_summary
-from libs.embeddings.embedder import generate_embedding
 from libs.utils.config import get_database_url, get_minio_config
-from services.api.models import Article, Entity, ArticleEntity
-from sqlalchemy.dialects.postgresql import insert
+from services.processor.stages import STAGE_LIST, STAGES, DEAD, PROCESS_OUTAGE_MIN_BATCH
+from services.processor.gauges import queue_depth, record_run
 
 # Config
 DATABASE_URL = get_database_url()
@@ -27,6 +18,13 @@ MINIO_SECRET_KEY = MINIO_CONFIG["secret_key"]
 MINIO_SECURE = MINIO_CONFIG["secure"]
 MINIO_BUCKET = "articles-raw"
 
+# Articles a worker claims per stage per run
+PROCESS_BATCH_SIZE = int(os.getenv("PROCESS_BATCH_SIZE", "50"))
+# Wall-clock budget for one drain run (one Celery task); kept well below the lease
+PROCESS_TIME_BUDGET = int(os.getenv("PROCESS_TIME_BUDGET", "240"))
+# How long a claim is held; rows of a crashed worker are picked up after this
+PROCESS_LEASE_SECONDS = int(os.getenv("PROCESS_LEASE_SECONDS", "900"))
+
 # Setup
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
@@ -48,118 +46,161 @@ def init_resources():
         print(f"Resource initialization failed (MinIO): {e}")
         raise
 
-def run_process():
-    init_resources()
-    print("Starting Processor Service...")
-    session = SessionLocal()
+def claim_batch(session, stage, batch_size=PROCESS_BATCH_SIZE, lease_seconds=PROCESS_LEASE_SECONDS, article_ids=None):
+    """
+    Atomically claim up to `batch_size` articles pending for `stage` by setting
+    their lease. Rows locked or leased by other workers are skipped
+    (FOR UPDATE SKIP LOCKED), so concurrent workers never get the same rows.
+    `article_ids` restricts the claim to those articles.
+    Returns the claimed articles, oldest first.
+    """
+    candidates = select(Article.id).where(stage.pending())
+    if article_ids is not None:
+        candidates = candidates.where(Article.id.in_(article_ids))
+    candidates = candidates.order_by(Article.created_at).limit(batch_size) \
+        .with_for_update(skip_locked=True)
+    stmt = update(Article) \
+        .where(Article.id.in_(candidates.scalar_subquery())) \
+        .values({stage.lease_column: func.now() + timedelta(seconds=lease_seconds)}) \
+        .returning(Article.id) \
+        .execution_options(synchronize_session=False)
+    ids = [row.id for row in session.execute(stmt)]
+    session.commit()
     
-    # Fetch articles that need cleaning (raw_path exists, cleaned_text is null)
-    # Limit batch size to avoid memory issues (e.g., 50 at a time)
-    # Also process articles that have cleaned_text but NO language (for backfill)
-    articles = session.query(Article).filter(
-        Article.raw_storage_path.isnot(None)
-    ).limit(50).all()
-    # Simplified filter: just fetch 50 and check logic in list iteration to see what needs work
-    # Or keep specific filter? using simple filter to catch partials.
-    # Refined filter:
-    articles = session.query(Article).filter(
-        Article.raw_storage_path.isnot(None), 
-        # Only process if embedding is missing (last step)
-        Article.embedding.is_(None)
-    ).limit(50).all()
+    if not ids:
+        return []
+    return session.query(Article).filter(Article.id.in_(ids)).order_by(Article.created_at).all()
+
+def run_stage(session, stage, batch_size=PROCESS_BATCH_SIZE, article_ids=None):
+    """
+    Run one stage over up to `batch_size` articles claimed for this worker,
+    optionally only among `article_ids`.
+    Each article is committed on its own; failures back off or quarantine
+    the article (Stage.fail). A batch that fails as a whole with one error is
+    an outage: the stage backs off (Stage.back_off) and is skipped until then.
+    Returns the number of articles completed (not failed).
+    """
+    if stage.backing_off():
+        return 0
+    articles = claim_batch(session, stage, batch_size, article_ids=article_ids)
     
-    print(f"Found {len(articles)} articles to process.")
+    prepared = {}
+    if stage.prepare is not None and articles:
+        try:
+            prepared = stage.prepare(session, articles)
+        except Exception as e:
+            # Articles without a prepared value are handled one by one
+            print(f"Batch step of stage {stage.name} failed: {e}")
+            session.rollback()
     
+    completed = 0
+    failures = []
     for article in articles:
         try:
-            # Phase 2: Cleaning
-            cleaned_text = article.cleaned_text
-            word_count = article.word_count
-            
-            if not cleaned_text:
-                # Get from MinIO
-                try:
-                    data = minio_client.get_object(MINIO_BUCKET, article.raw_storage_path)
-                    content_bytes = data.read()
-                    
-                    if article.raw_storage_path.endswith('.pdf'):
-                        cleaned_text = extract_from_pdf(content_bytes)
-                    else:
-                        # Default to HTML
-                        cleaned_text = clean_html(content_bytes.decode('utf-8', errors='ignore'))
-                    
-                    word_count = len(cleaned_text.split()) if cleaned_text else 0
-                    
-                    article.cleaned_text = cleaned_text
-                    article.word_count = str(word_count) 
-                except Exception as e:
-                    print(f"MinIO/Cleaning error for {article.id}: {e}")
-                    # If MinIO fails, we can't do much. 
-                    continue
-
-            if not cleaned_text:
-                continue
-
-            # Phase 3: Language Detection
-            lang = article.language
-            if not lang:
-                lang, conf = detect_language(cleaned_text)
-                article.language = lang
-                article.language_confidence = str(conf)
-            
-            # Phase 4: Categorization
-            topic = article.primary_category
-            if not topic:
-                topic, topic_conf = categorize_text(cleaned_text, lang)
-                article.primary_category = topic
-                article.topic_confidence = str(topic_conf)
-            
-            # Phase 5: Entity Extraction
-            # Check if we already have entities linked? 
-            # We can check DB, but extraction is fast enough to redo for safety
-            entities = extract_entities(cleaned_text, lang)
-            for ent_type, ent_text in entities:
-                # Get or create Entity
-                existing_ent = session.query(Entity).filter_by(text=ent_text, type=ent_type).first()
-                if not existing_ent:
-                    existing_ent = Entity(text=ent_text, type=ent_type)
-                    session.add(existing_ent)
-                    session.flush() # Get ID
-                
-                # Check link
-                existing_link = session.query(ArticleEntity).filter_by(article_id=article.id, entity_id=existing_ent.id).first()
-                if not existing_link:
-                    link = ArticleEntity(article_id=article.id, entity_id=existing_ent.id)
-                    session.add(link)
-
-            # Phase 6: Summarization
-            summary_text = article.summary_text
-            if not summary_text:
-                summary_text, summary_bullets = generate_summary(cleaned_text, lang)
-                if summary_text:
-                    article.summary_text = summary_text
-                    article.summary_bullets = summary_bullets
-                
-            # Phase 7: Embeddings
-            if not article.embedding:
-                text_to_embed = summary_text if summary_text else (cleaned_text[:500] if cleaned_text else "")
-                embedding = generate_embedding(text_to_embed)
-                if embedding:
-                    article.embedding = embedding
-            
-            print(f"Processed {article.id}: {word_count} words., Lang: {lang}, Topic: {topic}, Entities: {len(entities)}, Summary: {'Yes' if summary_text else 'No'}, Embed: {'Yes' if embedding else 'No'}")
-            
-            # Commit per article or batch? Per article safer for job retry.
+            if stage.prepare is not None:
+                status = stage.run(session, article, prepared.get(article.id))
+            else:
+                status = stage.run(session, article)
+            stage.mark(article, status)
+            # Commit per article: safer for job retry
             session.commit()
-            
+            completed += 1
         except Exception as e:
-            print(f"Error processing article {article.id}: {e}")
+            print(f"Error in stage {stage.name} for article {article.id}: {e}")
+            session.rollback()
+            failures.append((article, e))
+    
+    if completed:
+        stage.recovered()
+    errors = {f"{type(e).__name__}: {e}" for _, e in failures}
+    if not completed and len(failures) >= PROCESS_OUTAGE_MIN_BATCH and len(errors) == 1:
+        try:
+            delay = stage.back_off(articles, errors.pop())
+            session.commit()
+            print(f"Stage {stage.name} failed for the whole batch; backing off {delay}s.")
+        except Exception as mark_error:
+            print(f"Could not record outage for stage {stage.name}: {mark_error}")
+            session.rollback()
+        return completed
+    
+    for article, e in failures:
+        try:
+            if stage.fail(article, e) == DEAD:
+                print(f"Article {article.id} quarantined after {article.failure_count} failures.")
+            session.commit()
+        except Exception as mark_error:
+            print(f"Could not record failure for {article.id}: {mark_error}")
             session.rollback()
-            # Continue to next article
-            pass
-            
-    print("Batch complete.")
-    session.close()
+    
+    return completed
+
+def run_process(stages=None, batch_size=PROCESS_BATCH_SIZE):
+    """
+    Run the given stage names (default: all, in pipeline order).
+    Returns {stage_name: articles_completed}.
+    """
+    init_resources()
+    print("Starting Processor Service...")
+    session = SessionLocal()
+    
+    selected = [STAGES[name] for name in stages] if stages else STAGE_LIST
+    counts = {}
+    try:
+        for stage in selected:
+            counts[stage.name] = run_stage(session, stage, batch_size)
+            if counts[stage.name]:
+                print(f"Stage {stage.name}: processed {counts[stage.name]} articles.")
+    finally:
+        session.close()
+    
+    print(f"Batch complete: {counts}")
+    return counts
+
+def process_articles(article_ids):
+    """
+    Run every stage, in pipeline order, over the given articles only.
+    Stages already done or claimed elsewhere are skipped per article.
+    Returns the number of stage runs completed.
+    """
+    if not article_ids:
+        return 0
+    session = SessionLocal()
+    try:
+        return sum(run_stage(session, stage, len(article_ids), article_ids=article_ids) for stage in STAGE_LIST)
+    finally:
+        session.close()
+
+def drain(time_budget=PROCESS_TIME_BUDGET, stages=None, batch_size=PROCESS_BATCH_SIZE):
+    """
+    Keep running rounds of all stages while there is work and the time budget
+    lasts. Stops after the first round that completes nothing, so an empty
+    backlog costs one claim query per stage and rows that keep failing do not
+    spin the loop. Publishes queue depth and
+    throughput gauges when done.
+    Returns (processed, backlog_left).
+    """
+    init_resources()
+    session = SessionLocal()
+    
+    selected = [STAGES[name] for name in stages] if stages else STAGE_LIST
+    started = time.monotonic()
+    processed = 0
+    try:
+        while time.monotonic() - started < time_budget:
+            round_count = sum(run_stage(session, stage, batch_size) for stage in selected)
+            processed += round_count
+            if not round_count:
+                break
+        
+        depth = queue_depth(session, selected)
+    finally:
+        session.close()
+    
+    elapsed = time.monotonic() - started
+    record_run(depth, processed, elapsed)
+    backlog_left = sum(depth.values())
+    print(f"Drain run: processed {processed} in {elapsed:.1f}s, {backlog_left} pending.")
+    return processed, backlog_left
 
 if __name__ == "__main__":
     run_process()
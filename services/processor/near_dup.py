@@ -0,0 +1,91 @@
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, or_, select, literal, delete
+from sqlalchemy.dialects.postgresql import insert, UUID
+from services.api.models import Article, ArticleEntity, SimhashBand
+from libs.dedup.simhash import simhash, tokenize, bands, hamming_distance, from_signed, MAX_DISTANCE
+
+# Texts shorter than this are not fingerprinted (too little signal, too many false matches)
+NEAR_DUP_MIN_TOKENS = int(os.getenv("NEAR_DUP_MIN_TOKENS", "50"))
+# Wire-story copies show up within days; older canonicals are not considered
+# and their band rows are pruned, so buckets only ever hold this window
+NEAR_DUP_WINDOW_DAYS = int(os.getenv("NEAR_DUP_WINDOW_DAYS", "14"))
+
+# Fields a duplicate takes over from its canonical article instead of recomputing
+REUSED_FIELDS = (
+    "language", "language_confidence", "primary_category", "topic_confidence",
+    "summary_text", "summary_bullets", "embedding",
+)
+
+def fingerprint_text(text):
+    """
+    Unsigned SimHash of cleaned text, or None if it is too short to compare.
+    """
+    if not text or len(tokenize(text)) < NEAR_DUP_MIN_TOKENS:
+        return None
+    return simhash(text)
+
+def find_canonical(session, article_id, fingerprint):
+    """
+    Closest fully processed canonical article within MAX_DISTANCE bits, or None.
+    Candidates come from the LSH band index; distances are checked in Python.
+    """
+    band_match = or_(*[
+        and_(SimhashBand.band == i, SimhashBand.value == value)
+        for i, value in enumerate(bands(fingerprint))
+    ])
+    since = datetime.now(timezone.utc) - timedelta(days=NEAR_DUP_WINDOW_DAYS)
+    candidates = session.query(Article.id, Article.simhash) \
+        .join(SimhashBand, SimhashBand.article_id == Article.id) \
+        .filter(
+            band_match,
+            Article.id != article_id,
+            Article.duplicate_of.is_(None),
+            Article.embedding.isnot(None),
+            Article.entities_status == "done",
+            Article.created_at >= since,
+            SimhashBand.created_at >= since
+        ).distinct().all()
+
+    best_id, best_distance = None, MAX_DISTANCE + 1
+    for candidate_id, candidate_hash in candidates:
+        distance = hamming_distance(fingerprint, from_signed(candidate_hash))
+        if distance < best_distance:
+            best_id, best_distance = candidate_id, distance
+
+    return session.get(Article, best_id) if best_id else None
+
+def index_fingerprint(session, article_id, fingerprint):
+    """
+    Add a canonical article's fingerprint to the LSH band index.
+    """
+    rows = [{"band": i, "value": value, "article_id": article_id} for i, value in enumerate(bands(fingerprint))]
+    session.execute(insert(SimhashBand).values(rows).on_conflict_do_nothing())
+
+def prune_fingerprints(session, days=NEAR_DUP_WINDOW_DAYS):
+    """
+    Drop band rows older than the near-dup window; they can no longer match.
+    Keeps LSH buckets small as the archive grows. Returns the rows deleted.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    result = session.execute(delete(SimhashBand).where(SimhashBand.created_at < since))
+    session.commit()
+    return result.rowcount
+
+def reuse_canonical(session, article, canonical):
+    """
+    Link `article` to its canonical and copy the expensive NLP results,
+    including its entity links, instead of recomputing them.
+    """
+    article.duplicate_of = canonical.id
+    for field in REUSED_FIELDS:
+        if getattr(article, field) is None:
+            setattr(article, field, getattr(canonical, field))
+
+    links = select(literal(article.id, UUID(as_uuid=True)), ArticleEntity.entity_id) \
+        .where(ArticleEntity.article_id == canonical.id)
+    session.execute(
+        insert(ArticleEntity)
+        .from_select(["article_id", "entity_id"], links)
+        .on_conflict_do_nothing()
+    )
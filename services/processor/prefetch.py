@@ -0,0 +1,77 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from services.crawler.raw_segments import read_article_raw
+
+# Raw bodies fetched ahead of the consumer so MinIO round trips overlap with
+# parsing. At most PREFETCH_AHEAD articles are queued and no new fetch starts
+# while fetched-but-unconsumed bodies exceed PREFETCH_MEMORY_BUDGET, so memory
+# stays under the budget plus PREFETCH_CONCURRENCY in-flight bodies.
+# Each GET response is closed and its connection released by read_article_raw.
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "8"))
+PREFETCH_AHEAD = int(os.getenv("PREFETCH_AHEAD", "16"))
+PREFETCH_MEMORY_BUDGET = int(os.getenv("PREFETCH_MEMORY_BUDGET", str(64 * 1024 * 1024)))
+
+def _raw_ref(article):
+    # Plain snapshot: ORM instances are not touched from fetch threads
+    return SimpleNamespace(
+        raw_segment=article.raw_segment,
+        raw_offset=article.raw_offset,
+        raw_length=article.raw_length,
+        raw_storage_path=article.raw_storage_path
+    )
+
+class RawPrefetcher:
+    """
+    Context manager iterating (article, raw_bytes, error) in input order.
+
+        with RawPrefetcher(articles) as prefetcher:
+            for article, content, error in prefetcher:
+                ...
+    """
+
+    def __init__(self, articles, concurrency=PREFETCH_CONCURRENCY, ahead=PREFETCH_AHEAD, memory_budget=PREFETCH_MEMORY_BUDGET):
+        self.articles = articles
+        self.concurrency = concurrency
+        self.ahead = max(ahead, 1)
+        self.memory_budget = memory_budget
+        self.executor = None
+        self.pending = deque()
+
+    def __enter__(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        return self
+
+    def __exit__(self, *exc):
+        for _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=True)
+
+    def _buffered_bytes(self):
+        return sum(
+            len(future.result()) for _, future in self.pending
+            if future.done() and not future.cancelled() and future.exception() is None
+        )
+
+    def _fill(self, remaining):
+        while len(self.pending) < self.ahead and self._buffered_bytes() < self.memory_budget:
+            article = next(remaining, None)
+            if article is None:
+                return
+            self.pending.append((article, self.executor.submit(read_article_raw, _raw_ref(article))))
+
+    def __iter__(self):
+        remaining = iter(self.articles)
+        while True:
+            self._fill(remaining)
+            if not self.pending:
+                return
+            article, future = self.pending.popleft()
+            try:
+                content = future.result()
+            except Exception as e:
+                yield article, None, e
+            else:
+                yield article, content, None
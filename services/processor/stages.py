@@ -0,0 +1,299 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, or_, func
+from services.api.models import Article
+from libs.language_detection.detector import detect_language
+from libs.categorization.categorizer import categorize_text
+from libs.entity_extraction.extractor import extract_entities
+from libs.summarization.summarizer import generate_summary
+from libs.embeddings.embedder import generate_embeddings
+from libs.dedup.simhash import to_signed
+from services.crawler.raw_store import raw_kind
+from services.crawler.raw_segments import read_article_raw
+from services.processor.near_dup import fingerprint_text, find_canonical, index_fingerprint, reuse_canonical
+from services.processor.entity_store import resolve_entity_ids, cache_entity_ids, link_entities
+from services.processor.cpu_pool import PROCESS_POOL_WORKERS, pool_map, pool_submit, clean_content
+from services.processor.prefetch import RawPrefetcher, PREFETCH_MEMORY_BUDGET
+
+# Per-stage processing state. Every stage has <name>_status / <name>_version
+# columns on articles:
+#   NULL     pending
+#   'done'   finished at <name>_version (bumping Stage.version re-runs it)
+#   'empty'  finished with nothing to pass on (e.g. no text); dependents never run
+#   'failed' errored; retried once articles.next_retry_at has passed
+#   'dead'   failed PROCESS_MAX_FAILURES times in a row; never selected again
+#            until requeued (POST /dead-letter/{id}/requeue)
+# A stage only selects rows whose prerequisites are 'done', so each stage can
+# run, retry and scale on its own and finished work is never redone.
+# <name>_leased_until marks rows a worker has claimed for the stage; other
+# workers skip them until the stage finishes or the lease expires.
+DONE = "done"
+EMPTY = "empty"
+FAILED = "failed"
+DEAD = "dead"
+
+# Failures before an article is quarantined, and the retry backoff:
+# base * 2^(failures - 1), capped
+PROCESS_MAX_FAILURES = int(os.getenv("PROCESS_MAX_FAILURES", "5"))
+PROCESS_RETRY_BASE_SECONDS = int(os.getenv("PROCESS_RETRY_BASE_SECONDS", "60"))
+PROCESS_RETRY_MAX_SECONDS = int(os.getenv("PROCESS_RETRY_MAX_SECONDS", str(6 * 3600)))
+# A claimed batch of at least this many articles that all fail with the same
+# error is an outage (MinIO, embedding server, ...), not bad articles: the
+# stage backs off instead and failure_count is left alone (Stage.back_off)
+PROCESS_OUTAGE_MIN_BATCH = int(os.getenv("PROCESS_OUTAGE_MIN_BATCH", "3"))
+
+def _retry_delay(failures):
+    return min(PROCESS_RETRY_BASE_SECONDS * 2 ** (failures - 1), PROCESS_RETRY_MAX_SECONDS)
+
+class Stage:
+    """
+    run(session, article) -> status processes one article. A stage with
+    prepare(session, articles) -> {article_id: value} computes its work for
+    the whole claimed batch at once; run then gets run(session, article, value).
+    """
+
+    def __init__(self, name, version, requires, run, where=None, prepare=None):
+        self.name = name
+        self.version = version
+        self.requires = requires
+        self.run = run
+        self.where = where
+        self.prepare = prepare
+        # Stage-wide backoff after outages, for this worker process
+        self.outages = 0
+        self.backoff_until = None
+
+    @property
+    def status_column(self):
+        return getattr(Article, f"{self.name}_status")
+
+    @property
+    def version_column(self):
+        return getattr(Article, f"{self.name}_version")
+
+    @property
+    def lease_column(self):
+        return getattr(Article, f"{self.name}_leased_until")
+
+    def pending(self):
+        """
+        SQL condition selecting articles this stage still has to process.
+        """
+        conditions = [or_(
+            self.status_column.is_(None),
+            self.status_column == FAILED,
+            and_(self.status_column == DONE, self.version_column < self.version)
+        )]
+        conditions.append(or_(self.lease_column.is_(None), self.lease_column < func.now()))
+        # Articles backing off after a failure wait for their retry time
+        conditions.append(or_(Article.next_retry_at.is_(None), Article.next_retry_at <= func.now()))
+        conditions += [STAGES[name].status_column == DONE for name in self.requires]
+        if self.where is not None:
+            conditions.append(self.where)
+        return and_(*conditions)
+
+    def mark(self, article, status):
+        setattr(article, f"{self.name}_status", status)
+        setattr(article, f"{self.name}_version", self.version)
+        setattr(article, f"{self.name}_leased_until", None)
+        if status in (DONE, EMPTY) and article.failure_count:
+            article.failure_count = 0
+            article.next_retry_at = None
+
+    def fail(self, article, error):
+        """
+        Record a failure: back off exponentially, or quarantine the article
+        as 'dead' once it has failed PROCESS_MAX_FAILURES times in a row.
+        """
+        article.failure_count = (article.failure_count or 0) + 1
+        article.last_error = f"{self.name}: {error}"[:2000]
+        if article.failure_count >= PROCESS_MAX_FAILURES:
+            self.mark(article, DEAD)
+            article.next_retry_at = None
+            return DEAD
+        self.mark(article, FAILED)
+        article.next_retry_at = datetime.now(timezone.utc) + timedelta(seconds=_retry_delay(article.failure_count))
+        return FAILED
+
+    def back_off(self, articles, error):
+        """
+        Record an outage that failed the whole batch: pause this stage and
+        retry the articles after the same exponential delay, counted per
+        consecutive outage instead of per article.
+        Returns the delay in seconds.
+        """
+        self.outages += 1
+        delay = _retry_delay(self.outages)
+        self.backoff_until = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        for article in articles:
+            article.last_error = f"{self.name}: {error}"[:2000]
+            self.mark(article, FAILED)
+            article.next_retry_at = self.backoff_until
+        return delay
+
+    def backing_off(self):
+        return self.backoff_until is not None and datetime.now(timezone.utc) < self.backoff_until
+
+    def recovered(self):
+        self.outages = 0
+        self.backoff_until = None
+
+def map_articles(func, articles, *fields):
+    """
+    Run func(article.<field>, ...) for every article on the CPU pool.
+    Returns {article_id: result} for the articles that succeeded.
+    """
+    results = pool_map(func, *[[getattr(article, field) for article in articles] for field in fields])
+    return {article.id: value for article, (ok, value) in zip(articles, results) if ok}
+
+# Phase 2: Cleaning
+# Raw bodies handed to the pool but not yet parsed: at most this many, and
+# together no more than PREFETCH_MEMORY_BUDGET, before the prefetcher is
+# asked for the next one
+CLEAN_MAX_IN_FLIGHT = int(os.getenv("CLEAN_MAX_IN_FLIGHT", str(2 * max(PROCESS_POOL_WORKERS, 1))))
+
+def prepare_clean(session, articles):
+    # Raw reads are prefetched in this process while earlier articles are
+    # already being parsed on the pool
+    cleaned = {}
+    in_flight = {}
+
+    def collect(future):
+        article_id, _ = in_flight.pop(future)
+        try:
+            ok, value = future.result()
+        except Exception as e:
+            # Pool broke mid-batch; this article is cleaned inline by run_clean
+            print(f"Cleaning failed for {article_id}: {e}")
+            return
+        if ok:
+            cleaned[article_id] = value
+
+    with RawPrefetcher(articles) as prefetcher:
+        for article, content, error in prefetcher:
+            if error is not None:
+                print(f"Raw read failed for {article.id}: {error}")
+                continue
+            while in_flight and (
+                len(in_flight) >= CLEAN_MAX_IN_FLIGHT
+                or sum(size for _, size in in_flight.values()) + len(content) > PREFETCH_MEMORY_BUDGET
+            ):
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+            future = pool_submit(clean_content, raw_kind(article.raw_storage_path), content, article.source)
+            in_flight[future] = (article.id, len(content))
+
+    for future in list(in_flight):
+        collect(future)
+    return cleaned
+
+def run_clean(session, article, cleaned_text=None):
+    if cleaned_text is None:
+        cleaned_text = clean_content(raw_kind(article.raw_storage_path), read_article_raw(article, session), article.source)
+
+    article.cleaned_text = cleaned_text
+    article.word_count = str(len(cleaned_text.split()) if cleaned_text else 0)
+    return DONE if cleaned_text else EMPTY
+
+# Phase 2b: Near-duplicate detection
+# Duplicates reuse the canonical's language, topic, summary, embedding and entities
+REUSED_STAGES = ("language", "category", "entities", "summary", "embedding")
+
+def run_dedup(session, article):
+    fingerprint = fingerprint_text(article.cleaned_text)
+    if fingerprint is None:
+        return DONE
+
+    article.simhash = to_signed(fingerprint)
+    canonical = find_canonical(session, article.id, fingerprint)
+    if canonical is None:
+        index_fingerprint(session, article.id, fingerprint)
+        return DONE
+
+    reuse_canonical(session, article, canonical)
+    for name in REUSED_STAGES:
+        STAGES[name].mark(article, DONE)
+    return DONE
+
+# Phase 3: Language Detection
+def prepare_language(session, articles):
+    return map_articles(detect_language, articles, "cleaned_text")
+
+def run_language(session, article, result=None):
+    lang, conf = result if result is not None else detect_language(article.cleaned_text)
+    article.language = lang
+    article.language_confidence = str(conf)
+    return DONE
+
+# Phase 4: Categorization
+def prepare_category(session, articles):
+    return map_articles(categorize_text, articles, "cleaned_text", "language")
+
+def run_category(session, article, result=None):
+    topic, topic_conf = result if result is not None else categorize_text(article.cleaned_text, article.language)
+    article.primary_category = topic
+    article.topic_confidence = str(topic_conf)
+    return DONE
+
+# Phase 5: Entity Extraction
+def prepare_entities(session, articles):
+    # Extract for the whole batch, then resolve every distinct entity at once
+    extracted = map_articles(extract_entities, articles, "cleaned_text", "language")
+    ids = resolve_entity_ids(session, [pair for pairs in extracted.values() for pair in pairs])
+    # Entities are shared: commit them before the per-article transactions
+    session.commit()
+    cache_entity_ids(ids)
+    return {article_id: [ids[pair] for pair in pairs] for article_id, pairs in extracted.items()}
+
+def run_entities(session, article, entity_ids=None):
+    if entity_ids is None:
+        # Not in the batch result: resolve this article's entities alone.
+        # They commit with the article, so they are not cached here.
+        pairs = extract_entities(article.cleaned_text, article.language)
+        ids = resolve_entity_ids(session, pairs)
+        entity_ids = [ids[pair] for pair in pairs]
+    link_entities(session, article.id, entity_ids)
+    return DONE
+
+# Phase 6: Summarization
+def prepare_summary(session, articles):
+    return map_articles(generate_summary, articles, "cleaned_text", "language")
+
+def run_summary(session, article, result=None):
+    summary_text, summary_bullets = result if result is not None else generate_summary(article.cleaned_text, article.language)
+    article.summary_text = summary_text
+    article.summary_bullets = summary_bullets
+    return DONE
+
+# Phase 7: Embeddings
+def embedding_input(article):
+    return article.summary_text or article.cleaned_text[:500]
+
+def prepare_embeddings(session, articles):
+    # One batched encode for the whole claim instead of one per article
+    embeddings = generate_embeddings([embedding_input(article) for article in articles])
+    if embeddings is None:
+        return {}
+    return {article.id: embedding for article, embedding in zip(articles, embeddings)}
+
+def run_embedding(session, article, embedding=None):
+    if embedding is None:
+        # The batched encode failed. Retrying article by article would only
+        # wait out the same dead backend once per article, so fail fast; the
+        # whole batch failing alike backs the stage off (Stage.back_off)
+        raise RuntimeError("Batch embedding failed")
+    article.embedding = embedding
+    return DONE
+
+STAGE_LIST = [
+    Stage("clean", 1, [], run_clean, where=Article.raw_storage_path.isnot(None), prepare=prepare_clean),
+    Stage("dedup", 1, ["clean"], run_dedup),
+    Stage("language", 1, ["clean", "dedup"], run_language, prepare=prepare_language),
+    Stage("category", 1, ["language"], run_category, prepare=prepare_category),
+    Stage("entities", 1, ["language"], run_entities, prepare=prepare_entities),
+    Stage("summary", 1, ["language"], run_summary, prepare=prepare_summary),
+    Stage("embedding", 1, ["summary"], run_embedding, prepare=prepare_embeddings),
+]
+STAGES = {stage.name: stage for stage in STAGE_LIST}
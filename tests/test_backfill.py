@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+from services.crawler import backfill
+
+class FakeRedis:
+    """Just the hash, set and list commands the backfill checkpoint uses."""
+
+    def __init__(self):
+        self.data = {}
+
+    def _encode(self, value):
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(self._encode(field))
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        fields = dict(mapping or {})
+        if field is not None:
+            fields[field] = value
+        for name, item in fields.items():
+            self.data.setdefault(key, {})[self._encode(name)] = self._encode(item)
+
+    def hsetnx(self, key, field, value):
+        if self.hget(key, field) is None:
+            self.hset(key, field, value)
+
+    def hdel(self, key, *fields):
+        for field in fields:
+            self.data.get(key, {}).pop(self._encode(field), None)
+
+    def hincrby(self, key, field, amount=1):
+        value = int(self.hget(key, field) or 0) + amount
+        self.hset(key, field, value)
+        return value
+
+    def sadd(self, key, member):
+        self.data.setdefault(key, set()).add(self._encode(member))
+
+    def srem(self, key, member):
+        self.data.get(key, set()).discard(self._encode(member))
+
+    def sismember(self, key, member):
+        return self._encode(member) in self.data.get(key, set())
+
+    def scard(self, key):
+        return len(self.data.get(key, set()))
+
+    def lpop(self, key):
+        items = self.data.get(key, [])
+        return items.pop(0) if items else None
+
+    def rpush(self, key, value):
+        self.data.setdefault(key, []).append(self._encode(value))
+
+def page(url):
+    return SimpleNamespace(url=url, news_story=None, last_modified=None)
+
+def pages_sitemap(url, count):
+    pages = [page(f"{url}/p{i}") for i in range(count)]
+    return SimpleNamespace(url=url, sub_sitemaps=[], all_pages=lambda: iter(pages))
+
+def test_max_pages_split_resumes_inside_child_sitemap(monkeypatch):
+    tree = SimpleNamespace(url="https://example.com/", sub_sitemaps=[
+        pages_sitemap("https://example.com/a.xml", 5),
+        pages_sitemap("https://example.com/b.xml", 3),
+    ])
+    redis = FakeRedis()
+    monkeypatch.setattr(backfill, "get_redis", lambda: redis)
+    monkeypatch.setattr(backfill, "init_resources", lambda: None)
+    monkeypatch.setattr(backfill, "sitemap_tree_for_homepage", lambda url: tree)
+    monkeypatch.setattr(backfill, "SITEMAP_CHUNK_SIZE", 2)
+    dispatched = []
+
+    def dispatch(source_name, chunk):
+        dispatched.extend(candidate["url"] for candidate in chunk)
+
+    backfill.plan_backfill("https://example.com/", "Test", dispatch, max_pages=3)
+    assert dispatched == [f"https://example.com/a.xml/p{i}" for i in range(3)]
+    assert backfill.get_backfill_state("Test")["status"] == "paused"
+
+    dispatched.clear()
+    backfill.plan_backfill("https://example.com/", "Test", dispatch)
+    assert dispatched == (
+        [f"https://example.com/a.xml/p{i}" for i in range(3, 5)]
+        + [f"https://example.com/b.xml/p{i}" for i in range(3)]
+    )
+    state = backfill.get_backfill_state("Test")
+    assert state["status"] == "dispatched"
+    assert state["pages_dispatched"] == 8
+    assert state["sitemaps_done"] == 2
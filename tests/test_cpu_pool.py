@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+from services.processor import cpu_pool
+
+class AssertingPool:
+    """A pool whose workers cannot start, as in a daemonic process."""
+
+    def map(self, *args, **kwargs):
+        raise AssertionError("daemonic processes are not allowed to have children")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+def square(x):
+    return x * x
+
+def test_daemonic_process_runs_inline(monkeypatch):
+    monkeypatch.setattr(cpu_pool, "_pool", None)
+    monkeypatch.setattr(cpu_pool, "_pool_disabled", False)
+    monkeypatch.setattr(cpu_pool.multiprocessing, "current_process", lambda: SimpleNamespace(daemon=True))
+
+    assert cpu_pool.get_pool() is None
+    assert cpu_pool.pool_map(square, [1, 2, 3]) == [(True, 1), (True, 4), (True, 9)]
+    assert cpu_pool.pool_submit(square, 4).result() == (True, 16)
+
+def test_pool_that_cannot_start_children_stays_disabled(monkeypatch):
+    monkeypatch.setattr(cpu_pool, "_pool", AssertingPool())
+    monkeypatch.setattr(cpu_pool, "_pool_disabled", False)
+
+    assert cpu_pool.pool_map(square, [1, 2]) == [(True, 1), (True, 4)]
+    assert cpu_pool._pool is None
+    assert cpu_pool._pool_disabled
+    assert cpu_pool.get_pool() is None
@@ -0,0 +1,47 @@
+import hashlib
+import io
+import os
+from services.crawler import raw_store
+
+class FakeResponse:
+    def __init__(self, body, chunk_size=raw_store.STREAM_CHUNK_SIZE, content_type="text/html"):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.headers = {"Content-Type": content_type}
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+class FakeObject(io.BytesIO):
+    def release_conn(self):
+        pass
+
+class FakeMinio:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, bucket, object_name, data, length, part_size=None, **kwargs):
+        parts = []
+        while True:
+            part = data.read(part_size or 1024 * 1024)
+            if not part:
+                break
+            parts.append(part)
+        self.objects[object_name] = b"".join(parts)
+
+    def get_object(self, bucket, object_name):
+        return FakeObject(self.objects[object_name])
+
+def test_store_response_round_trips_body_larger_than_one_chunk(monkeypatch):
+    fake = FakeMinio()
+    monkeypatch.setattr(raw_store, "minio_client", fake)
+    monkeypatch.setattr(raw_store, "object_exists", lambda object_name: False)
+    body = b"<html>" + os.urandom(256000)
+
+    object_name, rel_canonical = raw_store.store_response(FakeResponse(body))
+
+    assert object_name.endswith(".html.gz")
+    assert hashlib.sha256(body).hexdigest() in object_name
+    assert raw_store.read_raw(object_name) == body
+    assert rel_canonical is None